@@ -1,145 +1,565 @@
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from bisect import bisect_right
 from collections import Counter
+from functools import lru_cache
 from itertools import combinations, product
-from datetime import datetime
+import logging
+import threading
+from datetime import date, datetime, timedelta
 import data_manager
+import symptoms
 
+logger = logging.getLogger(__name__)
 
-def _split_triggers(trigger_string):
-    if not trigger_string:
-        return []
-    return [item.strip() for item in trigger_string.split(',') if item.strip()]
 
-def get_summary_stats(entries):
-    """Calculates summary statistics from craving entries."""
-    if not entries:
-        return {
-            "total_entries": 0,
-            "avg_intensity": "N/A",
-            "most_common_trigger": "N/A",
-            "most_used_coping": "N/A",
-            "most_common_pair": "N/A",
-            "most_common_sequence": "N/A",
-            "workday_weekend_distribution": {"workdays": 0, "weekend": 0},
-        }
+def _split_triggers(entry):
+    return symptoms.symptoms_for_entry(entry)
 
-    total_entries = len(entries)
 
-    intensities = []
-    trigger_counts = Counter()
-    coping_mechanisms = []
-    for entry in entries:
+def _parse_timestamp(timestamp):
+    if not timestamp:
+        return None
+    # fromisoformat is much faster than strptime and parses every
+    # "%Y-%m-%d %H:%M:%S" string to the same value; strptime still covers
+    # the unpadded forms it alone accepts.
+    try:
+        return datetime.fromisoformat(timestamp)
+    except (TypeError, ValueError):
+        pass
+    try:
+        return datetime.strptime(timestamp, "%Y-%m-%d %H:%M:%S")
+    except (TypeError, ValueError):
+        return None
+
+
+@lru_cache(maxsize=None)
+def _mask_pairs(mask):
+    return tuple(combinations(sorted(symptoms.symptoms_from_mask(mask)), 2))
+
+
+def _entry_pairs(entry, trigger_list):
+    mask = symptoms.mask_from_entry(entry)
+    if symptoms.triggers_text(mask) == (entry.get('triggers') or ''):
+        return _mask_pairs(mask)
+    return combinations(sorted(set(trigger_list)), 2)
+
+
+class SummaryStatsAccumulator:
+    """Keeps the summary statistics up to date one entry at a time.
+
+    Adding an entry costs O(k²) for k triggers (plus the insertion into the
+    chronological list). Entries may arrive out of order: the adjacent pair an
+    entry lands between is un-counted and replaced by the two new pairs.
+    Editing or deleting an entry needs a fresh accumulator.
+    """
+
+    def __init__(self, entries=()):
+        self.total_entries = 0
+        self.intensity_sum = 0
+        self.intensity_count = 0
+        self.trigger_counts = Counter()
+        self.coping_counts = Counter()
+        self.pair_counts = Counter()
+        self.sequence_counts = Counter()
+        self.workday_entries = 0
+        self.weekend_entries = 0
+        # Parallel lists sorted by (datetime, arrival number); equal timestamps
+        # keep arrival order, like the stable sort of a full rebuild.
+        self._chronological_keys = []
+        self._chronological_triggers = []
+        # A bulk load sorts once and counts sequences in chronological order,
+        # so ties resolve exactly as in a from-scratch computation.
+        timed = [item for item in (self._count_entry(entry) for entry in entries) if item[0] is not None]
+        timed.sort(key=lambda item: item[0])
+        for key, trigger_list in timed:
+            if self._chronological_triggers:
+                self._count_sequence(self._chronological_triggers[-1], trigger_list, 1)
+            self._chronological_keys.append(key)
+            self._chronological_triggers.append(trigger_list)
+
+    def _count_entry(self, entry):
+        """Counts everything except sequences; returns (chronological key or None, triggers)."""
+        self.total_entries += 1
         try:
-            intensities.append(int(entry.get('intensity', 0)))
+            self.intensity_sum += int(entry.get('intensity', 0))
+            self.intensity_count += 1
         except (TypeError, ValueError):
             pass
-        trigger_list = _split_triggers(entry.get('triggers', ''))
-        trigger_counts.update(trigger_list)
+        trigger_list = _split_triggers(entry)
+        self.trigger_counts.update(trigger_list)
         coping_value = entry.get('coping_mechanism')
         if coping_value:
-            coping_mechanisms.append(coping_value)
-
-    avg_intensity = f"{(sum(intensities) / len(intensities)):.2f}" if intensities else "N/A"
-    most_common_trigger = trigger_counts.most_common(1)[0][0] if trigger_counts else "N/A"
-    most_used_coping = Counter(coping_mechanisms).most_common(1)[0][0] if coping_mechanisms else "N/A"
+            self.coping_counts[coping_value] += 1
+        for pair in _entry_pairs(entry, trigger_list):
+            self.pair_counts[pair] += 1
 
-    pair_counter = Counter()
-    for entry in entries:
-        trigger_list = sorted(set(_split_triggers(entry.get('triggers', ''))))
-        if len(trigger_list) < 2:
-            continue
-        for pair in combinations(trigger_list, 2):
-            pair_counter[pair] += 1
+        dt = _parse_timestamp(entry.get('timestamp'))
+        if dt is None:
+            return None, trigger_list
+        if dt.weekday() < 5:
+            self.workday_entries += 1
+        else:
+            self.weekend_entries += 1
+        return (dt, self.total_entries), trigger_list
 
-    most_common_pair = "N/A"
-    if pair_counter:
-        pair, count = pair_counter.most_common(1)[0]
-        most_common_pair = f"{pair[0]} + {pair[1]} ({count})"
+    def add(self, entry):
+        key, trigger_list = self._count_entry(entry)
+        if key is None:
+            return
+        position = bisect_right(self._chronological_keys, key)
+        previous = self._chronological_triggers[position - 1] if position > 0 else None
+        following = (
+            self._chronological_triggers[position]
+            if position < len(self._chronological_triggers)
+            else None
+        )
+        if previous is not None and following is not None:
+            self._count_sequence(previous, following, -1)
+        if previous is not None:
+            self._count_sequence(previous, trigger_list, 1)
+        if following is not None:
+            self._count_sequence(trigger_list, following, 1)
+        self._chronological_keys.insert(position, key)
+        self._chronological_triggers.insert(position, trigger_list)
 
-    parsed_entries = []
-    for entry in entries:
-        timestamp = entry.get('timestamp')
-        try:
-            dt = datetime.strptime(timestamp, "%Y-%m-%d %H:%M:%S") if timestamp else None
-        except ValueError:
-            try:
-                dt = datetime.fromisoformat(timestamp)
-            except (TypeError, ValueError):
-                dt = None
-        parsed_entries.append({
-            'datetime': dt,
-            'triggers': _split_triggers(entry.get('triggers', ''))
-        })
-
-    chronological_entries = [item for item in parsed_entries if item['datetime'] is not None]
-    chronological_entries.sort(key=lambda item: item['datetime'])
-
-    sequential_counter = Counter()
-    for first, second in zip(chronological_entries, chronological_entries[1:]):
-        first_triggers = first['triggers']
-        second_triggers = second['triggers']
+    def _count_sequence(self, first_triggers, second_triggers, delta):
         if not first_triggers or not second_triggers:
-            continue
+            return
+        counter = self.sequence_counts
         for combo in product(first_triggers, second_triggers):
-            sequential_counter[combo] += 1
+            counter[combo] += delta
+            if counter[combo] <= 0:
+                del counter[combo]
 
-    most_common_sequence = "N/A"
-    if sequential_counter:
-        (first_trigger, second_trigger), count = sequential_counter.most_common(1)[0]
-        most_common_sequence = f"{first_trigger} → {second_trigger} ({count})"
+    def _top_sequence(self):
+        # Out-of-order adds change the Counter's insertion order, so ties are
+        # broken by name instead; a rebuild then reports the same winner.
+        if not self.sequence_counts:
+            return None
+        (first_trigger, second_trigger), count = min(
+            self.sequence_counts.items(), key=lambda item: (-item[1], item[0])
+        )
+        return first_trigger, second_trigger, count
+
+    def result(self):
+        """Returns the statistics in the shape of get_summary_stats()."""
+        top_pair = None
+        if self.pair_counts:
+            pair, count = self.pair_counts.most_common(1)[0]
+            top_pair = (pair[0], pair[1], count)
+        return _format_stats(
+            total_entries=self.total_entries,
+            intensity_sum=self.intensity_sum,
+            intensity_count=self.intensity_count,
+            top_trigger=self.trigger_counts.most_common(1)[0][0] if self.trigger_counts else None,
+            top_coping=self.coping_counts.most_common(1)[0][0] if self.coping_counts else None,
+            top_pair=top_pair,
+            top_sequence=self._top_sequence(),
+            workdays=self.workday_entries,
+            weekend=self.weekend_entries,
+        )
 
-    workday_entries = 0
-    weekend_entries = 0
-    for item in chronological_entries:
-        dt = item['datetime']
-        if dt.weekday() < 5:
-            workday_entries += 1
-        else:
-            weekend_entries += 1
 
+def _format_stats(*, total_entries, intensity_sum, intensity_count, top_trigger, top_coping,
+                  top_pair, top_sequence, workdays, weekend):
     return {
         "total_entries": total_entries,
-        "avg_intensity": avg_intensity,
-        "most_common_trigger": most_common_trigger,
-        "most_used_coping": most_used_coping,
-        "most_common_pair": most_common_pair,
-        "most_common_sequence": most_common_sequence,
+        "avg_intensity": f"{(intensity_sum / intensity_count):.2f}" if intensity_count else "N/A",
+        "most_common_trigger": top_trigger if top_trigger is not None else "N/A",
+        "most_used_coping": top_coping if top_coping is not None else "N/A",
+        "most_common_pair": f"{top_pair[0]} + {top_pair[1]} ({top_pair[2]})" if top_pair else "N/A",
+        "most_common_sequence": (
+            f"{top_sequence[0]} → {top_sequence[1]} ({top_sequence[2]})" if top_sequence else "N/A"
+        ),
         "workday_weekend_distribution": {
-            "workdays": workday_entries,
-            "weekend": weekend_entries,
+            "workdays": workdays,
+            "weekend": weekend,
         },
     }
 
 
-def create_intensity_plot(parent_frame, entries):
-    """Creates and embeds a plot of craving intensity over time."""
-    for widget in parent_frame.winfo_children():
-        widget.destroy()
+# 'numpy' computes pairs and sequences as matrix products (see analysis_numpy);
+# both backends return identical results.
+ANALYSIS_BACKENDS = ('python', 'numpy')
+_backend = {"name": "python"}
+
+
+def set_backend(name):
+    """Selects the summary statistics backend; falls back to 'python' without NumPy."""
+    if name == 'numpy':
+        try:
+            import analysis_numpy  # noqa: F401
+        except ImportError:
+            name = 'python'
+    _backend["name"] = name if name in ANALYSIS_BACKENDS else 'python'
+
+
+def get_backend():
+    return _backend["name"]
+
+
+def _numpy_summary_stats(entries):
+    import analysis_numpy
+
+    intensity_sum = 0
+    intensity_count = 0
+    coping_counts = Counter()
+    trigger_lists = []
+    datetimes = []
+    for entry in entries:
+        try:
+            intensity_sum += int(entry.get('intensity', 0))
+            intensity_count += 1
+        except (TypeError, ValueError):
+            pass
+        coping_value = entry.get('coping_mechanism')
+        if coping_value:
+            coping_counts[coping_value] += 1
+        trigger_lists.append(_split_triggers(entry))
+        datetimes.append(_parse_timestamp(entry.get('timestamp')))
+    stats = analysis_numpy.trigger_statistics(trigger_lists, datetimes)
+    return _format_stats(
+        total_entries=len(trigger_lists),
+        intensity_sum=intensity_sum,
+        intensity_count=intensity_count,
+        top_trigger=stats["most_common_trigger"],
+        top_coping=coping_counts.most_common(1)[0][0] if coping_counts else None,
+        top_pair=stats["most_common_pair"],
+        top_sequence=stats["most_common_sequence"],
+        workdays=stats["workdays"],
+        weekend=stats["weekend"],
+    )
+
+
+def get_summary_stats(entries, backend=None):
+    """Calculates summary statistics from craving entries."""
+    if (backend or _backend["name"]) == 'numpy':
+        return _numpy_summary_stats(entries)
+    return SummaryStatsAccumulator(entries).result()
+
+
+def get_cooccurrence_matrix(entries):
+    """Returns (symptom names, matrix) with matrix[a][b] = entries listing both a and b (NumPy)."""
+    import analysis_numpy
+
+    return analysis_numpy.cooccurrence_matrix([_split_triggers(entry) for entry in entries])
+
 
-    if not entries:
-        return
+ROLLING_WINDOWS = (7, 30, 90)
 
-    timestamps = []
-    intensities = []
+
+class RollingStats:
+    """Per-day prefix sums that answer any date-range aggregate in O(symptoms).
+
+    Row i of the daily table holds the totals of day first_day + i: entries,
+    intensity sum, entries with a valid intensity, drink events and one count
+    per symptom. Prefix sums are extended lazily from the first changed day,
+    so appending an entry for the latest day keeps every earlier sum valid.
+    """
+
+    _ENTRIES, _INTENSITY_SUM, _INTENSITY_COUNT, _DRINKS = range(4)
+    _FIRST_SYMPTOM = 4
+
+    def __init__(self, entries=()):
+        self._width = self._FIRST_SYMPTOM + len(symptoms.SYMPTOM_LIST)
+        self._first_day = None
+        self._daily = []
+        # _prefix[i] is the column-wise sum of _daily[:i].
+        self._prefix = [[0] * self._width]
+        for entry in entries:
+            self.add(entry)
+
+    @classmethod
+    def from_columns(cls, columns):
+        """Builds the daily table from the columnar snapshot (data_manager.load_snapshot()) with NumPy."""
+        import numpy as np
+        from columnar_snapshot import NAT
+
+        stats = cls()
+        timestamps = np.asarray(columns["timestamp"])
+        timed = timestamps != NAT
+        if not timed.any():
+            return stats
+        days = timestamps[timed] // 86400
+        first_day = int(days.min())
+        index = days - first_day
+        length = int(index.max()) + 1
+        intensity = np.asarray(columns["intensity"])[timed]
+        masks = np.asarray(columns["symptom_mask"])[timed]
+        table = [
+            np.bincount(index, minlength=length),
+            np.bincount(index, weights=intensity, minlength=length),
+            np.bincount(index, weights=intensity > 0, minlength=length),
+            np.bincount(index, weights=np.asarray(columns["drank"])[timed], minlength=length),
+        ]
+        for bit in range(len(symptoms.SYMPTOM_LIST)):
+            table.append(np.bincount(index, weights=(masks >> bit) & 1, minlength=length))
+        stats._first_day = date(1970, 1, 1).toordinal() + first_day
+        stats._daily = np.column_stack(table).astype(np.int64).tolist()
+        return stats
+
+    def add(self, entry):
+        dt = _parse_timestamp(entry.get('timestamp'))
+        if dt is None:
+            return
+        day = dt.toordinal()
+        if self._first_day is None:
+            self._first_day = day
+        elif day < self._first_day:
+            self._daily[:0] = [[0] * self._width for _ in range(self._first_day - day)]
+            self._first_day = day
+        index = day - self._first_day
+        while len(self._daily) <= index:
+            self._daily.append([0] * self._width)
+        row = self._daily[index]
+        row[self._ENTRIES] += 1
+        try:
+            row[self._INTENSITY_SUM] += int(entry.get('intensity', 0))
+            row[self._INTENSITY_COUNT] += 1
+        except (TypeError, ValueError):
+            pass
+        if entry.get('drank') == 'Tak':
+            row[self._DRINKS] += 1
+        for name in symptoms.symptoms_from_mask(symptoms.mask_from_entry(entry)):
+            row[self._FIRST_SYMPTOM + symptoms.SYMPTOM_IDS[name]] += 1
+        del self._prefix[index + 1:]
+
+    def _prefix_at(self, index):
+        while len(self._prefix) <= index:
+            previous = self._prefix[-1]
+            row = self._daily[len(self._prefix) - 1]
+            self._prefix.append([total + value for total, value in zip(previous, row)])
+        return self._prefix[index]
+
+    def totals(self, start, end):
+        """Aggregates the days from start to end (dates, both inclusive)."""
+        days = (end - start).days + 1
+        sums = [0] * self._width
+        if self._first_day is not None and days > 0:
+            low = max(start.toordinal() - self._first_day, 0)
+            high = min(end.toordinal() - self._first_day, len(self._daily) - 1)
+            if low <= high:
+                before = self._prefix_at(low)
+                sums = [total - earlier for total, earlier in zip(self._prefix_at(high + 1), before)]
+        days = max(days, 0)
+        return {
+            "days": days,
+            "entries": sums[self._ENTRIES],
+            "entries_per_day": sums[self._ENTRIES] / days if days else 0.0,
+            "avg_intensity": (
+                sums[self._INTENSITY_SUM] / sums[self._INTENSITY_COUNT] if sums[self._INTENSITY_COUNT] else None
+            ),
+            "drinks": sums[self._DRINKS],
+            "symptoms": dict(zip(symptoms.SYMPTOM_LIST, sums[self._FIRST_SYMPTOM:])),
+        }
+
+    def last_days(self, days, today=None):
+        """Aggregates the `days` days ending with today (inclusive)."""
+        end = today or date.today()
+        return self.totals(end - timedelta(days=days - 1), end)
+
+
+# Above this many points the plot shows daily means, downsampled further with
+# LTTB if needed, so drawing costs the same however long the history is.
+MAX_PLOT_POINTS = 500
+MAX_MARKER_POINTS = 100
+
+
+def intensity_series(entries):
+    """Returns [(datetime, intensity)] sorted by time, skipping unusable entries."""
+    points = []
     for entry in entries:
+        dt = _parse_timestamp(entry.get('timestamp'))
+        if dt is None:
+            continue
         try:
-            intensities.append(int(entry['intensity']))
-            timestamps.append(entry['timestamp'])
+            points.append((dt, int(entry['intensity'])))
         except (KeyError, TypeError, ValueError):
             continue
+    points.sort(key=lambda point: point[0])
+    return points
+
+
+def _daily_means(points):
+    totals = {}
+    for dt, intensity in points:
+        total = totals.setdefault(dt.date(), [0, 0])
+        total[0] += intensity
+        total[1] += 1
+    return [
+        (datetime.combine(day, datetime.min.time()), intensity_sum / count)
+        for day, (intensity_sum, count) in sorted(totals.items())
+    ]
+
 
-    if not intensities:
-        return
+def _lttb(points, threshold):
+    """Largest-Triangle-Three-Buckets downsampling of time-sorted points."""
+    if threshold >= len(points) or threshold < 3:
+        return list(points)
+    xs = [dt.timestamp() if dt.tzinfo else (dt - datetime(1970, 1, 1)).total_seconds() for dt, _ in points]
+    ys = [value for _, value in points]
+    sampled = [points[0]]
+    bucket_size = (len(points) - 2) / (threshold - 2)
+    selected = 0
+    for bucket in range(threshold - 2):
+        start = int(bucket * bucket_size) + 1
+        end = int((bucket + 1) * bucket_size) + 1
+        next_end = min(int((bucket + 2) * bucket_size) + 1, len(points))
+        next_count = max(next_end - end, 1)
+        average_x = sum(xs[end:next_end]) / next_count if next_end > end else xs[-1]
+        average_y = sum(ys[end:next_end]) / next_count if next_end > end else ys[-1]
+        best_area = -1.0
+        best = start
+        for index in range(start, end):
+            area = abs(
+                (xs[selected] - average_x) * (ys[index] - ys[selected])
+                - (xs[selected] - xs[index]) * (average_y - ys[selected])
+            )
+            if area > best_area:
+                best_area = area
+                best = index
+        sampled.append(points[best])
+        selected = best
+    sampled.append(points[-1])
+    return sampled
 
-    fig, ax = plt.subplots(figsize=(6, 4))
-    ax.plot(timestamps, intensities, marker='o', linestyle='-')
-    ax.set_title("Intensywność Głodów w Czasie")
-    ax.set_xlabel("Data")
-    ax.set_ylabel("Intensywność (1-10)")
-    plt.xticks(rotation=45)
-    plt.tight_layout()
 
-    canvas = FigureCanvasTkAgg(fig, master=parent_frame)
-    canvas.draw()
-    canvas.get_tk_widget().pack(fill="both", expand=True)
\ No newline at end of file
+def downsample_series(points, max_points=MAX_PLOT_POINTS):
+    if len(points) <= max_points:
+        return points
+    return _lttb(_daily_means(points), max_points)
+
+
+class IntensityPlot:
+    """Intensity-over-time chart that keeps one figure and canvas for its lifetime.
+
+    update() replaces the line data and asks for a redraw with draw_idle(),
+    so repeated refreshes neither rebuild widgets nor accumulate figures.
+    """
+
+    def __init__(self, parent_frame):
+        # matplotlib is imported here so that starting the app does not pay for it.
+        import matplotlib.dates as mdates
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        from matplotlib.figure import Figure
+
+        self.figure = Figure(figsize=(6, 4))
+        self.axes = self.figure.add_subplot()
+        (self.line,) = self.axes.plot([], [], marker='o', linestyle='-')
+        self.axes.set_title("Intensywność Głodów w Czasie")
+        self.axes.set_xlabel("Data")
+        self.axes.set_ylabel("Intensywność (1-10)")
+        locator = mdates.AutoDateLocator()
+        self.axes.xaxis.set_major_locator(locator)
+        self.axes.xaxis.set_major_formatter(mdates.ConciseDateFormatter(locator))
+        self.figure.set_layout_engine("tight")
+        self.canvas = FigureCanvasTkAgg(self.figure, master=parent_frame)
+        self.canvas.get_tk_widget().pack(fill="both", expand=True)
+
+    def update(self, entries):
+        self.set_points(downsample_series(intensity_series(entries)))
+
+    def set_points(self, points):
+        """Shows already prepared [(datetime, intensity)] points."""
+        self.line.set_data([dt for dt, _ in points], [value for _, value in points])
+        self.line.set_marker('o' if len(points) <= MAX_MARKER_POINTS else '')
+        if points:
+            self.axes.relim()
+            self.axes.autoscale_view()
+        self.canvas.draw_idle()
+
+
+class AnalysisWorker:
+    """Recomputes the analysis tab's results on a background thread.
+
+    reset() and append() mirror the app's entry list and each returns the new
+    data version; request() asks for results of the latest version. Requests
+    are coalesced, and a result whose version was overtaken while it was being
+    computed is dropped instead of published. publish(version, result) is
+    called on the worker thread, so it must hand the result to Tk itself.
+    """
+
+    def __init__(self, publish):
+        self._publish = publish
+        self._condition = threading.Condition()
+        self._operations = []
+        self._version = 0
+        self._requested = False
+        self._stopped = False
+        # Owned by the worker thread.
+        self._entries = []
+        self._summary_stats = None
+        self._rolling_stats = RollingStats()
+        self._thread = threading.Thread(target=self._run, name="analysis-worker", daemon=True)
+        self._thread.start()
+
+    def _submit(self, operation, entries):
+        with self._condition:
+            self._version += 1
+            self._operations.append((operation, list(entries)))
+            self._condition.notify()
+            return self._version
+
+    def reset(self, entries):
+        return self._submit("reset", entries)
+
+    def append(self, entries):
+        return self._submit("append", entries)
+
+    def request(self):
+        with self._condition:
+            self._requested = True
+            self._condition.notify()
+
+    def stop(self):
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not (self._stopped or self._operations or self._requested):
+                    self._condition.wait()
+                if self._stopped:
+                    return
+                operations, self._operations = self._operations, []
+                requested, self._requested = self._requested, False
+                version = self._version
+            for operation, entries in operations:
+                self._apply(operation, entries)
+            if not requested:
+                continue
+            try:
+                result = self._compute()
+            except Exception:
+                logger.exception("Analysis worker failed to compute results")
+                continue
+            with self._condition:
+                if self._stopped or version != self._version:
+                    continue
+            self._publish(version, result)
+
+    def _apply(self, operation, entries):
+        if operation == "reset":
+            self._entries = entries
+            self._summary_stats = None
+            self._rolling_stats = RollingStats(entries)
+            return
+        self._entries.extend(entries)
+        for entry in entries:
+            if self._summary_stats is not None:
+                self._summary_stats.add(entry)
+            self._rolling_stats.add(entry)
+
+    def _compute(self):
+        if get_backend() == 'numpy':
+            stats = get_summary_stats(self._entries, backend='numpy')
+        else:
+            if self._summary_stats is None:
+                self._summary_stats = SummaryStatsAccumulator(self._entries)
+            stats = self._summary_stats.result()
+        return {
+            "stats": stats,
+            "rolling": {days: self._rolling_stats.last_days(days) for days in ROLLING_WINDOWS},
+            "plot_points": downsample_series(intensity_series(self._entries)),
+        }
@@ -0,0 +1,140 @@
+# Vectorized trigger statistics on an entries × symptoms count matrix.
+#
+# Every function here takes the per-entry trigger lists (as returned by
+# symptoms.symptoms_for_entry) and reproduces the Counter-based results of
+# analysis.SummaryStatsAccumulator, ties included: Counter.most_common keeps
+# first-insertion order, so among equal counts the winner is the item that
+# the pure-Python loops would have met first. Sequence ties are the exception:
+# both paths pick the alphabetically first pair of names.
+import numpy as np
+
+import symptoms
+
+# 1970-01-01 (day 0 of datetime64[D]) was a Thursday.
+_EPOCH_WEEKDAY = 3
+
+
+def build_trigger_matrix(trigger_lists):
+    """Returns (names, counts): counts[i, j] is how often entry i lists names[j].
+
+    The columns are SYMPTOM_LIST followed by any unknown names from legacy
+    entries, in order of first appearance.
+    """
+    index = dict(symptoms.SYMPTOM_IDS)
+    names = list(symptoms.SYMPTOM_LIST)
+    lengths = np.fromiter((len(triggers) for triggers in trigger_lists), dtype=np.int64, count=len(trigger_lists))
+    columns = []
+    for triggers in trigger_lists:
+        for name in triggers:
+            column = index.get(name)
+            if column is None:
+                column = index[name] = len(names)
+                names.append(name)
+            columns.append(column)
+    rows = np.repeat(np.arange(len(trigger_lists), dtype=np.int64), lengths)
+    flat = rows * len(names) + np.asarray(columns, dtype=np.int64)
+    counts = np.bincount(flat, minlength=len(trigger_lists) * len(names))
+    return names, counts.reshape(len(trigger_lists), len(names)).astype(np.float64)
+
+
+def cooccurrence_matrix(trigger_lists):
+    """Returns (names, matrix) where matrix[a, b] counts entries listing both a and b.
+
+    The diagonal holds the number of entries listing each symptom.
+    """
+    names, counts = build_trigger_matrix(trigger_lists)
+    present = (counts > 0).astype(np.float64)
+    return names, np.rint(present.T @ present).astype(np.int64)
+
+
+def sequence_matrix(trigger_lists, datetimes):
+    """Returns (names, matrix) where matrix[a, b] counts a → b between chronologically adjacent entries.
+
+    Entries whose datetime is None are left out, and symptoms listed twice
+    in one entry count twice, as in itertools.product.
+    """
+    names, counts = build_trigger_matrix(trigger_lists)
+    order, _ = _chronological_order(datetimes)
+    ordered = counts[order]
+    return names, np.rint(ordered[:-1].T @ ordered[1:]).astype(np.int64)
+
+
+def _chronological_order(datetimes):
+    """Returns (indices of timed entries sorted stably by time, their datetime64 values)."""
+    timed = np.fromiter((dt is not None for dt in datetimes), dtype=bool, count=len(datetimes))
+    indices = np.flatnonzero(timed)
+    values = np.array(
+        [datetimes[i].replace(tzinfo=None) for i in indices],
+        dtype='datetime64[us]',
+    ).reshape(-1)
+    order = np.argsort(values, kind='stable')
+    return indices[order], values[order]
+
+
+def _first_row(column):
+    rows = np.flatnonzero(column)
+    return int(rows[0]) if rows.size else -1
+
+
+def trigger_statistics(trigger_lists, datetimes):
+    """Computes the trigger part of the summary statistics.
+
+    Returns a dict with most_common_trigger (name or None), most_common_pair
+    and most_common_sequence ((first, second, count) or None), workdays and
+    weekend.
+    """
+    names, counts = build_trigger_matrix(trigger_lists)
+    present = counts > 0
+    result = {
+        "most_common_trigger": None,
+        "most_common_pair": None,
+        "most_common_sequence": None,
+        "workdays": 0,
+        "weekend": 0,
+    }
+
+    totals = counts.sum(axis=0)
+    if totals.size and totals.max() > 0:
+        candidates = np.flatnonzero(totals == totals.max())
+
+        def trigger_key(column):
+            row = _first_row(present[:, column])
+            return row, trigger_lists[row].index(names[column])
+
+        result["most_common_trigger"] = names[min(candidates, key=trigger_key)]
+
+    # Pairs are keyed by the lexicographically sorted names, like
+    # combinations(sorted(...), 2) in the pure-Python path.
+    rank = np.empty(len(names), dtype=np.int64)
+    rank[sorted(range(len(names)), key=names.__getitem__)] = np.arange(len(names))
+    presence = present.astype(np.float64)
+    pair_counts = np.rint(presence.T @ presence).astype(np.int64)
+    pair_counts[rank[:, None] >= rank[None, :]] = 0
+    if pair_counts.size and pair_counts.max() > 0:
+        first_candidates, second_candidates = np.nonzero(pair_counts == pair_counts.max())
+
+        def pair_key(pair):
+            first, second = pair
+            return _first_row(present[:, first] & present[:, second]), rank[first], rank[second]
+
+        first, second = min(zip(first_candidates, second_candidates), key=pair_key)
+        result["most_common_pair"] = (names[first], names[second], int(pair_counts[first, second]))
+
+    order, values = _chronological_order(datetimes)
+    weekdays = (values.astype('datetime64[D]').astype(np.int64) + _EPOCH_WEEKDAY) % 7
+    result["workdays"] = int(np.count_nonzero(weekdays < 5))
+    result["weekend"] = int(weekdays.size - result["workdays"])
+
+    if order.size >= 2:
+        ordered = counts[order]
+        sequence_counts = np.rint(ordered[:-1].T @ ordered[1:]).astype(np.int64)
+        if sequence_counts.max() > 0:
+            first_candidates, second_candidates = np.nonzero(sequence_counts == sequence_counts.max())
+            # Ties go to the alphabetically first (first, second) names.
+            first, second = min(
+                zip(first_candidates, second_candidates),
+                key=lambda pair: (names[pair[0]], names[pair[1]]),
+            )
+            result["most_common_sequence"] = (names[first], names[second], int(sequence_counts[first, second]))
+
+    return result
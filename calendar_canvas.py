@@ -0,0 +1,247 @@
+import tkinter as tk
+
+MAX_DAYS = 31
+MIN_SYMPTOM_COLUMN_WIDTH = 80
+GRID_LINE_COLOR = "#b3b3b3"
+HOVER_OUTLINE_COLOR = "#333333"
+HEADER_BACKGROUND = "#e6e6e6"
+RESIZER_BACKGROUND = "#d0d0d0"
+LAYOUT_FRAME_MS = 16
+
+
+class CalendarCanvas:
+    """Draws the symptom × day grid on a single tk.Canvas.
+
+    Every cell is a rectangle plus a text item created once for the longest
+    month; clicks and hover are hit-tested from coordinates and only cells
+    whose (background, foreground, text) changed are reconfigured.
+    """
+
+    def __init__(
+        self,
+        master,
+        symptom_names,
+        *,
+        cell_state,
+        hover_color,
+        on_cell_click,
+        on_cell_menu,
+        on_day_click,
+        on_column_resize,
+        symptom_column_width,
+        resizer_width,
+        header_text,
+    ):
+        self.canvas = tk.Canvas(master, highlightthickness=0, background="#ffffff")
+        self.symptom_names = list(symptom_names)
+        self.symptom_column_width = symptom_column_width
+        self.resizer_width = resizer_width
+        self._cell_state = cell_state
+        self._hover_color = hover_color
+        self._on_cell_click = on_cell_click
+        self._on_cell_menu = on_cell_menu
+        self._on_day_click = on_day_click
+        self._on_column_resize = on_column_resize
+        self._days = MAX_DAYS
+        self._column_width = 1.0
+        self._row_height = 1.0
+        self._cells = {}
+        self._states = {}
+        self._day_headers = {}
+        self._symptom_labels = []
+        self._hovered = None
+        self._drag_start = None
+        self._layout_job = None
+        self._applied_geometry = None
+        self._applied_wrap = None
+
+        self._header_rect = self.canvas.create_rectangle(0, 0, 0, 0, fill=HEADER_BACKGROUND, outline=GRID_LINE_COLOR)
+        self._header_text = self.canvas.create_text(0, 0, text=header_text, anchor="w", tags=("bold_text",))
+        self._resizer = self.canvas.create_rectangle(0, 0, 0, 0, fill=RESIZER_BACKGROUND, outline="")
+        for day in range(1, MAX_DAYS + 1):
+            rect = self.canvas.create_rectangle(0, 0, 0, 0, fill=HEADER_BACKGROUND, outline=GRID_LINE_COLOR)
+            text = self.canvas.create_text(0, 0, text=str(day), tags=("base_text",))
+            self._day_headers[day] = (rect, text)
+        for symptom in self.symptom_names:
+            rect = self.canvas.create_rectangle(0, 0, 0, 0, fill="#ffffff", outline=GRID_LINE_COLOR)
+            text = self.canvas.create_text(0, 0, text=symptom, anchor="w", tags=("base_text",))
+            self._symptom_labels.append((rect, text))
+            for day in range(1, MAX_DAYS + 1):
+                cell_rect = self.canvas.create_rectangle(0, 0, 0, 0, fill="#f0f0f0", outline=GRID_LINE_COLOR)
+                cell_text = self.canvas.create_text(0, 0, text="", tags=("base_text",))
+                self._cells[(symptom, day)] = (cell_rect, cell_text)
+
+        self.canvas.bind("<Configure>", lambda event: self.schedule_layout())
+        self.canvas.bind("<Motion>", self._on_motion)
+        self.canvas.bind("<Leave>", lambda event: self._set_hover(None))
+        self.canvas.bind("<ButtonPress-1>", self._on_press)
+        self.canvas.bind("<B1-Motion>", self._on_drag)
+        self.canvas.bind("<ButtonRelease-1>", self._on_release)
+        self.canvas.bind("<Button-3>", self._on_menu)
+
+    def pack(self, **kwargs):
+        self.canvas.pack(**kwargs)
+
+    def winfo_exists(self):
+        return bool(self.canvas.winfo_exists())
+
+    def set_fonts(self, base_font, bold_font):
+        self.canvas.itemconfigure("base_text", font=base_font)
+        self.canvas.itemconfigure("bold_text", font=bold_font)
+
+    def show_month(self, days_in_month):
+        """Shows the first `days_in_month` day columns and repaints changed cells."""
+        if days_in_month != self._days:
+            self._days = days_in_month
+            for day in range(1, MAX_DAYS + 1):
+                state = "normal" if day <= days_in_month else "hidden"
+                for item in self._day_headers[day]:
+                    self.canvas.itemconfigure(item, state=state)
+                for symptom in self.symptom_names:
+                    for item in self._cells[(symptom, day)]:
+                        self.canvas.itemconfigure(item, state=state)
+            self.layout()
+        self.refresh()
+
+    def refresh(self):
+        for symptom in self.symptom_names:
+            for day in range(1, self._days + 1):
+                self.update_cell(symptom, day)
+
+    def update_cell(self, symptom, day):
+        key = (symptom, day)
+        items = self._cells.get(key)
+        if items is None or day > self._days:
+            return
+        state = self._cell_state(symptom, day)
+        if self._states.get(key) == state:
+            return
+        self._states[key] = state
+        background, foreground, text = state
+        rect, text_item = items
+        fill = self._hover_color(background) if key == self._hovered else background
+        self.canvas.itemconfigure(rect, fill=fill)
+        self.canvas.itemconfigure(text_item, fill=foreground, text=text)
+
+    def schedule_layout(self):
+        """Coalesces bursts of resize events into one layout pass per frame."""
+        if self._layout_job is None:
+            self._layout_job = self.canvas.after(LAYOUT_FRAME_MS, self.layout)
+
+    def layout(self):
+        if self._layout_job is not None:
+            self.canvas.after_cancel(self._layout_job)
+            self._layout_job = None
+        width = max(1, self.canvas.winfo_width())
+        height = max(1, self.canvas.winfo_height())
+        label_width = self.symptom_column_width
+        # Re-wrapping the symptom labels is deferred until a resizer drag ends.
+        wrap = self._applied_wrap if self._drag_start is not None else max(10, label_width - 10)
+        if wrap != self._applied_wrap:
+            self._applied_wrap = wrap
+            self.canvas.itemconfigure(self._header_text, width=wrap)
+            for _, text in self._symptom_labels:
+                self.canvas.itemconfigure(text, width=wrap)
+        geometry = (width, height, label_width, self._days)
+        if geometry == self._applied_geometry:
+            return
+        self._applied_geometry = geometry
+        grid_left = label_width + self.resizer_width
+        self._column_width = max(1.0, (width - grid_left) / self._days)
+        self._row_height = max(1.0, height / (len(self.symptom_names) + 1))
+        column_width = self._column_width
+        row_height = self._row_height
+
+        self.canvas.coords(self._header_rect, 0, 0, label_width, row_height)
+        self.canvas.coords(self._header_text, 5, row_height / 2)
+        self.canvas.coords(self._resizer, label_width, 0, grid_left, height)
+        for day in range(1, self._days + 1):
+            left = grid_left + (day - 1) * column_width
+            rect, text = self._day_headers[day]
+            self.canvas.coords(rect, left, 0, left + column_width, row_height)
+            self.canvas.coords(text, left + column_width / 2, row_height / 2)
+        for row, symptom in enumerate(self.symptom_names, start=1):
+            top = row * row_height
+            rect, text = self._symptom_labels[row - 1]
+            self.canvas.coords(rect, 0, top, label_width, top + row_height)
+            self.canvas.coords(text, 5, top + row_height / 2)
+            for day in range(1, self._days + 1):
+                left = grid_left + (day - 1) * column_width
+                cell_rect, cell_text = self._cells[(symptom, day)]
+                self.canvas.coords(cell_rect, left, top, left + column_width, top + row_height)
+                self.canvas.coords(cell_text, left + column_width / 2, top + row_height / 2)
+
+    def _hit_test(self, x, y):
+        row = int(y // self._row_height)
+        if row < 0 or row > len(self.symptom_names):
+            return None
+        if x < self.symptom_column_width:
+            return None
+        grid_left = self.symptom_column_width + self.resizer_width
+        if x < grid_left:
+            return ("resizer",)
+        day = int((x - grid_left) // self._column_width) + 1
+        if day > self._days:
+            return None
+        if row == 0:
+            return ("day", day)
+        return ("cell", self.symptom_names[row - 1], day)
+
+    def _set_hover(self, key):
+        if key == self._hovered:
+            return
+        if self._hovered is not None:
+            rect = self._cells[self._hovered][0]
+            background = self._states.get(self._hovered, ("#f0f0f0",))[0]
+            self.canvas.itemconfigure(rect, fill=background, width=1, outline=GRID_LINE_COLOR)
+        self._hovered = key
+        if key is not None:
+            rect = self._cells[key][0]
+            background = self._states.get(key, ("#f0f0f0",))[0]
+            self.canvas.itemconfigure(rect, fill=self._hover_color(background), width=2, outline=HOVER_OUTLINE_COLOR)
+            self.canvas.tag_raise(rect)
+            self.canvas.tag_raise(self._cells[key][1])
+
+    def _on_motion(self, event):
+        if self._drag_start is not None:
+            return
+        hit = self._hit_test(event.x, event.y)
+        if hit is None:
+            cursor = ""
+        elif hit[0] == "resizer":
+            cursor = "sb_h_double_arrow"
+        else:
+            cursor = "hand2"
+        if self.canvas.cget("cursor") != cursor:
+            self.canvas.configure(cursor=cursor)
+        self._set_hover((hit[1], hit[2]) if hit and hit[0] == "cell" else None)
+
+    def _on_press(self, event):
+        hit = self._hit_test(event.x, event.y)
+        if hit is None:
+            return
+        if hit[0] == "resizer":
+            self._drag_start = (event.x_root, self.symptom_column_width)
+        elif hit[0] == "day":
+            self._on_day_click(hit[1])
+        else:
+            self._on_cell_click(event, hit[1], hit[2])
+
+    def _on_drag(self, event):
+        if self._drag_start is None:
+            return
+        start_x, start_width = self._drag_start
+        self.symptom_column_width = max(MIN_SYMPTOM_COLUMN_WIDTH, start_width + event.x_root - start_x)
+        self.schedule_layout()
+
+    def _on_release(self, event):
+        if self._drag_start is None:
+            return
+        self._drag_start = None
+        self.layout()
+        self._on_column_resize(self.symptom_column_width)
+
+    def _on_menu(self, event):
+        hit = self._hit_test(event.x, event.y)
+        if hit and hit[0] == "cell":
+            self._on_cell_menu(event, hit[1], hit[2])
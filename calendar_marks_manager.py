@@ -1,6 +1,12 @@
+import atexit
 import json
+import logging
 import os
-from typing import Dict, Optional
+import threading
+from collections.abc import Mapping
+from typing import Dict, Iterator, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
 
 
 def _normalize_mark_value(value):
@@ -14,82 +20,369 @@ def _normalize_mark_value(value):
     return {"scale": ""}
 
 MARKS_FILE = 'calendar_marks.json'
+LOG_FILE = 'calendar_marks.log'
+# Version 1 files are a bare {date: {symptom: value}} dict with legacy values;
+# version 2 wraps normalized marks as {"version": 2, "marks": {...}}.
+FORMAT_VERSION = 2
+LOG_COMPACT_THRESHOLD = 64 * 1024
+FLUSH_DELAY = 2.0
+
+MonthKey = Tuple[int, int]
+CellKey = Tuple[int, str]
+
+
+class MarkRecord:
+    __slots__ = ("scale",)
+
+    def __init__(self, scale: str = "") -> None:
+        self.scale = scale
+
+    def as_dict(self) -> Dict[str, str]:
+        return {"scale": self.scale}
+
+
+def _parse_date_key(date_key: str) -> Optional[Tuple[int, int, int]]:
+    try:
+        year, month, day = date_key.split("-")
+        return int(year), int(month), int(day)
+    except (AttributeError, ValueError):
+        return None
+
+
+class CalendarMarks(Mapping):
+    """Marks indexed by (year, month), so a whole month is fetched with one lookup.
+
+    Read as a mapping it has the shape load_marks() always returned,
+    {date: {symptom: {"scale": ...}}}; the inner dicts are copies, so changes
+    go through set_mark/update_mark/remove_mark.
+    """
+
+    __slots__ = ("_months", "_unparsed")
+
+    def __init__(self) -> None:
+        self._months: Dict[MonthKey, Dict[CellKey, MarkRecord]] = {}
+        # Date keys that are not YYYY-MM-DD are kept only so they survive a rewrite.
+        self._unparsed: Dict[str, Dict[str, MarkRecord]] = {}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Dict[str, object]]) -> "CalendarMarks":
+        marks = cls()
+        for date_key, day_marks in data.items():
+            if not isinstance(day_marks, dict):
+                continue
+            for symptom, value in day_marks.items():
+                marks.set(date_key, symptom, _normalize_mark_value(value)["scale"])
+        return marks
+
+    def _locate(self, date_key: str, symptom: str, create: bool = False):
+        parsed = _parse_date_key(date_key)
+        if parsed is None:
+            buckets, bucket_key, cell_key = self._unparsed, date_key, symptom
+        else:
+            year, month, day = parsed
+            buckets, bucket_key, cell_key = self._months, (year, month), (day, symptom)
+        bucket = buckets.setdefault(bucket_key, {}) if create else buckets.get(bucket_key)
+        return buckets, bucket_key, bucket, cell_key
+
+    def record(self, date_key: str, symptom: str) -> Optional[MarkRecord]:
+        _, _, bucket, cell_key = self._locate(date_key, symptom)
+        return bucket.get(cell_key) if bucket else None
+
+    def set(self, date_key: str, symptom: str, scale: str) -> None:
+        _, _, bucket, cell_key = self._locate(date_key, symptom, create=True)
+        record = bucket.get(cell_key)
+        if record is None:
+            bucket[cell_key] = MarkRecord(scale)
+        else:
+            record.scale = scale
+
+    def remove(self, date_key: str, symptom: str) -> bool:
+        buckets, bucket_key, bucket, cell_key = self._locate(date_key, symptom)
+        if not bucket or cell_key not in bucket:
+            return False
+        del bucket[cell_key]
+        if not bucket:
+            del buckets[bucket_key]
+        return True
 
+    def month(self, year: int, month: int) -> Dict[CellKey, MarkRecord]:
+        return self._months.get((year, month), {})
 
-def _load_from_disk() -> Dict[str, Dict[str, Dict[str, str]]]:
+    def to_dict(self) -> Dict[str, Dict[str, Dict[str, str]]]:
+        data: Dict[str, Dict[str, Dict[str, str]]] = {}
+        for (year, month), cells in sorted(self._months.items()):
+            for (day, symptom), record in sorted(cells.items(), key=lambda item: item[0][0]):
+                data.setdefault(f"{year:04d}-{month:02d}-{day:02d}", {})[symptom] = record.as_dict()
+        for date_key, cells in self._unparsed.items():
+            data[date_key] = {symptom: record.as_dict() for symptom, record in cells.items()}
+        return data
+
+    def __getitem__(self, date_key: str) -> Dict[str, Dict[str, str]]:
+        parsed = _parse_date_key(date_key)
+        if parsed is None:
+            cells = self._unparsed.get(date_key, {})
+        else:
+            year, month, day = parsed
+            cells = {
+                symptom: record
+                for (cell_day, symptom), record in self._months.get((year, month), {}).items()
+                if cell_day == day
+            }
+        if not cells:
+            raise KeyError(date_key)
+        return {symptom: record.as_dict() for symptom, record in cells.items()}
+
+    def __iter__(self) -> Iterator[str]:
+        for (year, month), cells in sorted(self._months.items()):
+            for day in sorted({day for day, _ in cells}):
+                yield f"{year:04d}-{month:02d}-{day:02d}"
+        yield from self._unparsed
+
+    def __len__(self) -> int:
+        return sum(len({day for day, _ in cells}) for cells in self._months.values()) + len(self._unparsed)
+
+
+# Marks are loaded once and then served from memory. Each change becomes one
+# JSON line for LOG_FILE; lines are buffered and appended together FLUSH_DELAY
+# seconds after the last change (and by flush(), at exit). The snapshot in
+# MARKS_FILE is only rewritten when the log grows past LOG_COMPACT_THRESHOLD
+# (or by save_marks/compact).
+_cache = {"marks": None}
+_pending = {"lines": [], "timer": None}
+_lock = threading.RLock()
+
+
+def _apply_operation(marks: CalendarMarks, operation: Dict[str, str]) -> bool:
+    """Applies one set/update/remove operation in place; returns whether it changed anything."""
+    date_key = operation.get("date")
+    symptom = operation.get("symptom")
+    if not isinstance(date_key, str) or not isinstance(symptom, str):
+        return False
+    if operation.get("op") == "remove":
+        return marks.remove(date_key, symptom)
+    if operation.get("op") not in ("set", "update"):
+        return False
+    scale = operation.get("scale")
+    if scale is None:
+        current = marks.record(date_key, symptom)
+        scale = current.scale if current is not None else ""
+    marks.set(date_key, symptom, str(scale))
+    return True
+
+
+def _replay_log(marks: CalendarMarks) -> CalendarMarks:
+    if not os.path.exists(LOG_FILE):
+        return marks
+    try:
+        with open(LOG_FILE, 'rb') as f:
+            raw = f.read()
+        complete_end = raw.rfind(b'\n') + 1
+        if complete_end < len(raw):
+            # A write interrupted by a crash leaves a torn last line; drop it so
+            # the next append starts on a fresh line.
+            with open(LOG_FILE, 'r+b') as f:
+                f.truncate(complete_end)
+    except OSError:
+        return marks
+    for line in raw[:complete_end].decode('utf-8', errors='replace').splitlines():
+        try:
+            operation = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        if isinstance(operation, dict):
+            _apply_operation(marks, operation)
+    return marks
+
+
+def _load_snapshot() -> Tuple[int, Dict[str, Dict[str, object]]]:
     if not os.path.exists(MARKS_FILE):
-        return {}
+        return FORMAT_VERSION, {}
     try:
         with open(MARKS_FILE, 'r', encoding='utf-8') as f:
             data = json.load(f)
-            if isinstance(data, dict):
-                return data
     except (json.JSONDecodeError, OSError):
-        pass
-    return {}
+        return FORMAT_VERSION, {}
+    if not isinstance(data, dict):
+        return FORMAT_VERSION, {}
+    if isinstance(data.get("version"), int) and isinstance(data.get("marks"), dict):
+        return data["version"], data["marks"]
+    return 1, data
+
+
+def _load_from_disk() -> CalendarMarks:
+    version, raw_marks = _load_snapshot()
+    marks = _replay_log(CalendarMarks.from_dict(raw_marks))
+    if version < FORMAT_VERSION:
+        # One-time migration: store the normalized marks so reads never need to.
+        _write_to_disk(marks)
+    return marks
+
+
+def load_marks() -> CalendarMarks:
+    with _lock:
+        if _cache["marks"] is None:
+            _cache["marks"] = _load_from_disk()
+        return _cache["marks"]
+
 
+def _write_to_disk(marks: CalendarMarks) -> None:
+    # The snapshot includes every buffered change, so they need no log lines.
+    _cancel_flush()
+    temp_path = f"{MARKS_FILE}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump({"version": FORMAT_VERSION, "marks": marks.to_dict()}, f, ensure_ascii=False, indent=2)
+    os.replace(temp_path, MARKS_FILE)
+    # The snapshot now contains every logged operation.
+    if os.path.exists(LOG_FILE):
+        os.remove(LOG_FILE)
 
-def load_marks() -> Dict[str, Dict[str, Dict[str, str]]]:
-    return _load_from_disk()
 
+def _as_marks(marks: Union[CalendarMarks, Dict, None]) -> CalendarMarks:
+    """Returns marks to read from; a plain dict is wrapped in a throwaway copy."""
+    if marks is None:
+        return load_marks()
+    if isinstance(marks, CalendarMarks):
+        return marks
+    # A plain {date: {symptom: value}} dict, as accepted before CalendarMarks.
+    return CalendarMarks.from_dict(marks)
 
-def save_marks(marks: Dict[str, Dict[str, Dict[str, str]]]) -> None:
-    with open(MARKS_FILE, 'w', encoding='utf-8') as f:
-        json.dump(marks, f, ensure_ascii=False, indent=2)
+
+def _apply_to_dict(data: Dict, operation: Dict[str, str]) -> bool:
+    """Applies an operation to a plain {date: {symptom: value}} dict the way it always was."""
+    date_key, symptom = operation["date"], operation["symptom"]
+    if operation["op"] == "remove":
+        day_marks = data.get(date_key)
+        if not day_marks or symptom not in day_marks:
+            return False
+        del day_marks[symptom]
+        if not day_marks:
+            del data[date_key]
+        return True
+    day_marks = data.setdefault(date_key, {})
+    current = _normalize_mark_value(day_marks.get(symptom, {}))
+    if operation.get("scale") is not None:
+        current["scale"] = operation["scale"]
+    day_marks[symptom] = current
+    return True
+
+
+def save_marks(marks: Union[CalendarMarks, Dict]) -> None:
+    """Replaces the stored marks with the given ones and writes a fresh snapshot."""
+    with _lock:
+        marks = _as_marks(marks)
+        _cache["marks"] = marks
+        _write_to_disk(marks)
+
+
+def compact() -> None:
+    """Folds the operation log into a fresh snapshot of the loaded marks."""
+    with _lock:
+        _write_to_disk(load_marks())
+
+
+def _cancel_flush() -> None:
+    with _lock:
+        timer, _pending["timer"] = _pending["timer"], None
+        _pending["lines"] = []
+    if timer is not None:
+        timer.cancel()
+
+
+def flush() -> None:
+    """Appends the buffered changes to the log in one write."""
+    with _lock:
+        lines = _pending["lines"]
+        _cancel_flush()
+        if not lines:
+            return
+        with open(LOG_FILE, 'a', encoding='utf-8') as f:
+            f.write("".join(lines))
+            log_size = f.tell()
+        if log_size > LOG_COMPACT_THRESHOLD:
+            _write_to_disk(_cache["marks"])
+
+
+def _flush_in_background() -> None:
+    try:
+        flush()
+    except OSError:
+        logger.exception("Saving calendar marks failed")
+
+
+def _record(operation: Dict[str, str]) -> None:
+    with _lock:
+        _pending["lines"].append(json.dumps(operation, ensure_ascii=False) + "\n")
+        # Restart the delay, so a burst of clicks ends up in one append.
+        if _pending["timer"] is not None:
+            _pending["timer"].cancel()
+        timer = _pending["timer"] = threading.Timer(FLUSH_DELAY, _flush_in_background)
+        timer.daemon = True
+        timer.start()
+
+
+atexit.register(flush)
 
 
+def _mutate(marks: Union[CalendarMarks, Dict, None], operation: Dict[str, str]) -> Union[CalendarMarks, Dict]:
+    with _lock:
+        current = load_marks()
+        if marks is None or marks is current:
+            if _apply_operation(current, operation):
+                _record(operation)
+            return current
+        # Marks other than the loaded ones (e.g. a plain dict) are changed in
+        # place and then stored as a whole, replacing what was loaded; the log
+        # only ever describes changes to the loaded marks.
+        if isinstance(marks, CalendarMarks):
+            changed = _apply_operation(marks, operation)
+        else:
+            changed = _apply_to_dict(marks, operation)
+        if changed:
+            save_marks(marks)
+        return marks
+
+
+# The read functions below only look at the in-memory marks and never write.
+
 def is_marked(
     date_key: str,
     symptom: str,
-    marks: Optional[Dict[str, Dict[str, Dict[str, str]]]] = None,
+    marks: Optional[CalendarMarks] = None,
 ) -> bool:
-    marks = load_marks() if marks is None else marks
-    day_marks = marks.get(date_key, {})
-    if symptom not in day_marks:
-        return False
-    value = day_marks[symptom]
-    if isinstance(value, dict):
-        return True
-    if isinstance(value, str) and value:
-        return True
-    return isinstance(value, str)
+    marks = _as_marks(marks)
+    return marks.record(date_key, symptom) is not None
 
 
 def get_mark(
     date_key: str,
     symptom: str,
-    marks: Optional[Dict[str, Dict[str, Dict[str, str]]]] = None,
+    marks: Optional[CalendarMarks] = None,
 ) -> Optional[Dict[str, str]]:
-    marks = load_marks() if marks is None else marks
-    day_marks = marks.get(date_key, {})
-    if symptom not in day_marks:
-        return None
-    value = day_marks[symptom]
-    normalized = _normalize_mark_value(value)
-    if normalized != value:
-        day_marks[symptom] = normalized
-        save_marks(marks)
-    return normalized
+    marks = _as_marks(marks)
+    record = marks.record(date_key, symptom)
+    return record.as_dict() if record is not None else None
 
-def get_scale(
-    date_key: str,
-    symptom: str,
-    marks: Optional[Dict[str, Dict[str, Dict[str, str]]]] = None,
-) -> Optional[str]:
-    mark = get_mark(date_key, symptom, marks)
-    if mark is None:
-        return None
-    return mark.get("scale") or None
 
 def get_scale(
     date_key: str,
     symptom: str,
-    marks: Optional[Dict[str, Dict[str, Dict[str, str]]]] = None,
+    marks: Optional[CalendarMarks] = None,
 ) -> Optional[str]:
-    mark = get_mark(date_key, symptom, marks)
-    if mark is None:
+    marks = _as_marks(marks)
+    record = marks.record(date_key, symptom)
+    if record is None:
         return None
-    return mark.get("scale") or None
+    return record.scale or None
+
+
+def get_month_marks(
+    year: int,
+    month: int,
+    marks: Optional[CalendarMarks] = None,
+) -> Dict[CellKey, MarkRecord]:
+    """Returns {(day, symptom): MarkRecord} for one month."""
+    marks = _as_marks(marks)
+    return marks.month(year, month)
 
 
 def update_mark(
@@ -97,37 +390,23 @@ def update_mark(
     symptom: str,
     *,
     scale: Optional[str] = None,
-    marks: Optional[Dict[str, Dict[str, Dict[str, str]]]] = None,
-) -> Dict[str, Dict[str, Dict[str, str]]]:
-    marks = load_marks() if marks is None else marks
-    day_marks = marks.setdefault(date_key, {})
-    current = _normalize_mark_value(day_marks.get(symptom, {}))
-    if scale is not None:
-        current["scale"] = scale
-    day_marks[symptom] = current
-    save_marks(marks)
-    return marks
+    marks: Union[CalendarMarks, Dict, None] = None,
+) -> Union[CalendarMarks, Dict]:
+    return _mutate(marks, {"op": "update", "date": date_key, "symptom": symptom, "scale": scale})
 
 
 def set_mark(
     date_key: str,
     symptom: str,
     scale: str = '',
-    marks: Optional[Dict[str, Dict[str, Dict[str, str]]]] = None,
-) -> Dict[str, Dict[str, Dict[str, str]]]:
-    return update_mark(date_key, symptom, scale=scale, marks=marks)
+    marks: Union[CalendarMarks, Dict, None] = None,
+) -> Union[CalendarMarks, Dict]:
+    return _mutate(marks, {"op": "set", "date": date_key, "symptom": symptom, "scale": scale})
 
 
 def remove_mark(
     date_key: str,
     symptom: str,
-    marks: Optional[Dict[str, Dict[str, Dict[str, str]]]] = None,
-) -> Dict[str, Dict[str, Dict[str, str]]]:
-    marks = load_marks() if marks is None else marks
-    day_marks = marks.get(date_key)
-    if day_marks and symptom in day_marks:
-        del day_marks[symptom]
-        if not day_marks:
-            del marks[date_key]
-        save_marks(marks)
-    return marks
+    marks: Union[CalendarMarks, Dict, None] = None,
+) -> Union[CalendarMarks, Dict]:
+    return _mutate(marks, {"op": "remove", "date": date_key, "symptom": symptom})
@@ -0,0 +1,238 @@
+# Columnar binary copy of the journal for fast analytics loads.
+#
+# Each column is a raw file of fixed-width little-endian values in
+# SNAPSHOT_DIR, read with np.memmap; meta.json records how many rows are
+# valid, how far into the source CSV they reach and the interned trigger and
+# coping strings. New rows are appended to the column files in place, after
+# the rows readers may have mapped, so an update costs only the new rows.
+# meta.json is written last, so it is the commit point of every update:
+# bytes past meta["rows"] (left by an interrupted update) are ignored and
+# cut off by the next append. A rebuild writes new files and os.replace()s
+# them, so memory maps held by readers stay valid.
+# Writers hold LOCK_FILE, so two processes never update the snapshot at once.
+import contextlib
+import json
+import os
+import time
+from datetime import datetime
+
+import numpy as np
+
+import symptoms
+
+SNAPSHOT_DIR = 'cravings_snapshot'
+META_FILE = 'meta.json'
+LOCK_FILE = 'write.lock'
+LOCK_TIMEOUT = 10.0
+STALE_LOCK_AGE = 60.0       # a lock file older than this was left by a crashed writer
+FORMAT_VERSION = 3
+COLUMNS = {
+    "timestamp": np.dtype('<i8'),     # seconds since 1970-01-01 (wall clock), NAT if unknown
+    "intensity": np.dtype('u1'),      # 0 if missing or invalid
+    "drank": np.dtype('?'),
+    "symptom_mask": np.dtype('<i8'),
+    "triggers": np.dtype('<i4'),      # index into meta["triggers_table"] (the original text), -1 if empty
+    "coping": np.dtype('<i4'),        # index into meta["coping_table"], -1 if empty
+}
+# String columns: (CSV field, meta.json table holding the distinct values).
+_STRING_COLUMNS = {"triggers": ("triggers", "triggers_table"), "coping": ("coping_mechanism", "coping_table")}
+# Same bit pattern as NaT, so timestamp.view('datetime64[s]') shows unknown times as NaT.
+NAT = np.iinfo(np.int64).min
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _column_path(name):
+    return os.path.join(SNAPSHOT_DIR, f"{name}.bin")
+
+
+def _meta_path():
+    return os.path.join(SNAPSHOT_DIR, META_FILE)
+
+
+class SnapshotLocked(Exception):
+    """Another process kept the snapshot's write lock for longer than LOCK_TIMEOUT."""
+
+
+@contextlib.contextmanager
+def write_lock(timeout=LOCK_TIMEOUT):
+    """Holds the snapshot's lock file (created exclusively) while updating it."""
+    os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+    path = os.path.join(SNAPSHOT_DIR, LOCK_FILE)
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(path) > STALE_LOCK_AGE:
+                    os.remove(path)
+                    continue
+            except FileNotFoundError:
+                continue
+            if time.monotonic() >= deadline:
+                raise SnapshotLocked(path)
+            time.sleep(0.05)
+    try:
+        os.write(fd, str(os.getpid()).encode('ascii'))
+        os.close(fd)
+        yield
+    finally:
+        os.remove(path)
+
+
+def read_meta():
+    try:
+        with open(_meta_path(), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+    if not isinstance(meta, dict) or meta.get("version") != FORMAT_VERSION:
+        return None
+    return meta
+
+
+def _write_meta(meta):
+    temp_path = f"{_meta_path()}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False)
+    os.replace(temp_path, _meta_path())
+
+
+def _parse_timestamp(value):
+    if not value:
+        return NAT
+    try:
+        dt = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        try:
+            dt = datetime.strptime(value, "%Y-%m-%d %H:%M:%S")
+        except (TypeError, ValueError):
+            return NAT
+    return int((dt.replace(tzinfo=None) - _EPOCH).total_seconds())
+
+
+def _parse_intensity(value):
+    try:
+        intensity = int(value)
+    except (TypeError, ValueError):
+        return 0
+    return intensity if 0 < intensity < 256 else 0
+
+
+def _intern(rows, field, table):
+    """Returns the codes of row[field] in table, appending strings not seen before."""
+    index = {value: code for code, value in enumerate(table)}
+    codes = []
+    for row in rows:
+        value = row.get(field) or ''
+        if not value:
+            codes.append(-1)
+            continue
+        code = index.get(value)
+        if code is None:
+            code = index[value] = len(table)
+            table.append(value)
+        codes.append(code)
+    return np.asarray(codes, dtype=np.int32)
+
+
+def rows_to_columns(rows, tables):
+    """Converts CSV rows (dicts of strings) to column arrays; new strings are appended to tables[table name]."""
+    count = len(rows)
+    columns = {
+        "timestamp": np.fromiter((_parse_timestamp(row.get('timestamp')) for row in rows), COLUMNS["timestamp"], count),
+        "intensity": np.fromiter((_parse_intensity(row.get('intensity')) for row in rows), COLUMNS["intensity"], count),
+        "drank": np.fromiter((row.get('drank') == 'Tak' for row in rows), COLUMNS["drank"], count),
+        "symptom_mask": np.fromiter((symptoms.mask_from_entry(row) for row in rows), COLUMNS["symptom_mask"], count),
+    }
+    for name, (field, table) in _STRING_COLUMNS.items():
+        columns[name] = _intern(rows, field, tables[table]).astype(COLUMNS[name])
+    return columns
+
+
+def _write_column(name, data):
+    # Replacing (not rewriting) the file keeps existing memory maps valid.
+    temp_path = f"{_column_path(name)}.tmp"
+    with open(temp_path, 'wb') as f:
+        np.asarray(data, dtype=COLUMNS[name]).tofile(f)
+    os.replace(temp_path, _column_path(name))
+
+
+def _append_column(name, rows, data):
+    """Writes data after the first `rows` values of a column file, dropping anything beyond them."""
+    with open(_column_path(name), 'r+b') as f:
+        f.truncate(rows * COLUMNS[name].itemsize)
+        f.seek(0, os.SEEK_END)
+        np.asarray(data, dtype=COLUMNS[name]).tofile(f)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def rebuild(rows, source, source_offset, header, source_tail):
+    """Replaces the whole snapshot with the given CSV rows; the caller holds write_lock().
+
+    source_tail identifies the source bytes just before source_offset, so a
+    replaced source file is not mistaken for a grown one.
+    """
+    os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+    # Without meta.json a half-written rebuild is never mistaken for a valid snapshot.
+    if os.path.exists(_meta_path()):
+        os.remove(_meta_path())
+    tables = {table: [] for _, table in _STRING_COLUMNS.values()}
+    columns = rows_to_columns(rows, tables)
+    for name in COLUMNS:
+        _write_column(name, columns[name])
+        # Column files of format version 2 were .npy files.
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(os.path.join(SNAPSHOT_DIR, f"{name}.npy"))
+    _write_meta(dict(
+        tables,
+        version=FORMAT_VERSION,
+        source=source,
+        source_offset=source_offset,
+        source_tail=source_tail,
+        header=list(header),
+        rows=len(rows),
+    ))
+
+
+def append(rows, meta, source_offset, source_tail):
+    """Appends CSV rows read up to source_offset to the snapshot described by meta; the caller holds write_lock().
+
+    Only the new rows are parsed and written; the existing rows are not read.
+    """
+    tables = {table: list(meta[table]) for _, table in _STRING_COLUMNS.values()}
+    columns = rows_to_columns(rows, tables)
+    for name in COLUMNS:
+        _append_column(name, meta["rows"], columns[name])
+    _write_meta(dict(
+        meta,
+        **tables,
+        source_offset=source_offset,
+        source_tail=source_tail,
+        rows=meta["rows"] + len(rows),
+    ))
+
+
+def load(mmap_mode='r'):
+    """Returns {column: array, table name: [...], "meta": meta} memory-mapped read-only, or None if there is no valid snapshot."""
+    meta = read_meta()
+    if meta is None:
+        return None
+    columns = {table: meta[table] for _, table in _STRING_COLUMNS.values()}
+    columns["meta"] = meta
+    rows = meta["rows"]
+    try:
+        for name, dtype in COLUMNS.items():
+            path = _column_path(name)
+            if os.path.getsize(path) < rows * dtype.itemsize:
+                return None
+            if rows:
+                columns[name] = np.memmap(path, dtype=dtype, mode=mmap_mode, shape=(rows,))
+            else:
+                # An empty file region cannot be memory-mapped.
+                columns[name] = np.empty(0, dtype=dtype)
+    except (OSError, ValueError):
+        return None
+    return columns
@@ -1,9 +1,20 @@
 # This file will handle data storage.
 import csv
+import io
 import os
 
+import sqlite_storage
+import symptoms
+
 DATA_FILE = 'cravings.csv'
-FIELDNAMES = ['timestamp', 'intensity', 'triggers', 'coping_mechanism', 'drank']
+FIELDNAMES = ['timestamp', 'intensity', 'triggers', 'coping_mechanism', 'drank', 'symptom_mask']
+
+BACKENDS = ('csv', 'sqlite')
+_backend = {"name": "csv"}
+
+# Position of the last read, so appended rows can be parsed without re-reading the file.
+_read_state = {"path": None, "offset": 0, "header": None}
+_migrated_files = set()
 
 def initialize_data_file():
     """Creates the data file with headers if it doesn't exist."""
@@ -11,17 +22,188 @@ def initialize_data_file():
         with open(DATA_FILE, 'w', newline='', encoding='utf-8') as f:
             writer = csv.writer(f)
             writer.writerow(FIELDNAMES)
+    _migrate_data_file()
+
+def _migrate_data_file():
+    """Adds the symptom_mask column to files written before it existed.
+
+    The triggers text is kept as is, so the rewrite loses nothing.
+    """
+    if DATA_FILE in _migrated_files:
+        return
+    with open(DATA_FILE, 'r', newline='', encoding='utf-8') as f:
+        reader = csv.DictReader(f)
+        header = list(reader.fieldnames or [])
+        if 'symptom_mask' in header or not header:
+            _migrated_files.add(DATA_FILE)
+            return
+        rows = list(reader)
+    for row in rows:
+        row['symptom_mask'] = str(symptoms.mask_from_entry(row))
+    temp_path = f"{DATA_FILE}.tmp"
+    with open(temp_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=header + ['symptom_mask'])
+        writer.writeheader()
+        writer.writerows(rows)
+    os.replace(temp_path, DATA_FILE)
+    _migrated_files.add(DATA_FILE)
+    _reset_read_state()
+
+def set_backend(name):
+    """Selects the storage backend ('csv' or 'sqlite').
+
+    Switching to SQLite for the first time migrates the existing CSV entries.
+    """
+    if name not in BACKENDS:
+        name = 'csv'
+    if name == 'sqlite' and _backend["name"] != 'sqlite':
+        sqlite_storage.migrate_from_csv(DATA_FILE)
+    _backend["name"] = name
+    _reset_read_state()
+
+def get_backend():
+    return _backend["name"]
 
 def save_craving(data):
     """Saves a single craving entry."""
+    data = dict(data)
+    if data.get('symptom_mask') in (None, ''):
+        data['symptom_mask'] = str(symptoms.mask_from_entry(data))
+    if _backend["name"] == 'sqlite':
+        sqlite_storage.save_craving(data)
+        return
     initialize_data_file()
     with open(DATA_FILE, 'a', newline='', encoding='utf-8') as f:
         writer = csv.DictWriter(f, fieldnames=FIELDNAMES)
         writer.writerow(data)
+    # The columnar snapshot is brought up to date by its reader (the viewer),
+    # so saving an entry never waits for it.
+
+def _reset_read_state():
+    _read_state.update(path=None, offset=0, header=None)
+
+def _parse_rows(raw, header):
+    reader = csv.DictReader(io.StringIO(raw.decode('utf-8'), newline=''), fieldnames=header)
+    return list(reader)
+
+def _read_csv():
+    """Returns (rows, header, bytes_read) for the whole CSV file."""
+    initialize_data_file()
+    with open(DATA_FILE, 'rb') as f:
+        raw = f.read()
+    header_end = raw.find(b'\n') + 1
+    if not header_end:
+        return [], None, 0
+    header = next(csv.reader([raw[:header_end].decode('utf-8-sig')]))
+    return _parse_rows(raw[header_end:], header), header, len(raw)
 
 def load_cravings():
     """Loads all craving entries."""
+    if _backend["name"] == 'sqlite':
+        return sqlite_storage.load_cravings()
+    _reset_read_state()
+    rows, header, size = _read_csv()
+    if header is not None:
+        _read_state.update(path=DATA_FILE, offset=size, header=header)
+    return rows
+
+def load_new_cravings():
+    """Loads only the craving entries appended since the last read.
+
+    Returns None when the file was replaced or truncated since then, in which
+    case the caller has to fall back to load_cravings().
+    """
+    if _backend["name"] == 'sqlite':
+        return sqlite_storage.load_new_cravings()
+    if _read_state["path"] != DATA_FILE or not os.path.exists(DATA_FILE):
+        return None
+    if os.path.getsize(DATA_FILE) < _read_state["offset"]:
+        return None
+    with open(DATA_FILE, 'rb') as f:
+        f.seek(_read_state["offset"])
+        raw = f.read()
+    # Only consume complete lines; a row still being written is picked up next time.
+    end = raw.rfind(b'\n') + 1
+    rows = _parse_rows(raw[:end], _read_state["header"]) if end else []
+    _read_state["offset"] += end
+    return rows
+
+def load_cravings_in_month(year, month):
+    """Loads the entries of one month; an indexed query on the SQLite backend."""
+    if _backend["name"] == 'sqlite':
+        return sqlite_storage.load_cravings_in_month(year, month)
+    prefix = f"{year:04d}-{month:02d}"
+    return [entry for entry in _read_csv()[0] if (entry.get('timestamp') or '').startswith(prefix)]
+
+def _read_header():
+    with open(DATA_FILE, 'rb') as f:
+        line = f.readline()
+    return next(csv.reader([line.decode('utf-8-sig')])) if line.endswith(b'\n') else None
+
+def _source_tail(offset, length=256):
+    """Hex of the CSV bytes just before offset, to tell a grown file from a replaced one."""
+    with open(DATA_FILE, 'rb') as f:
+        start = max(0, offset - length)
+        f.seek(start)
+        return f.read(offset - start).hex()
+
+def refresh_snapshot():
+    """Brings the columnar snapshot (see columnar_snapshot.py) up to date with the CSV file.
+
+    Rows appended since the last refresh are converted on their own; the
+    snapshot is rebuilt only when the file was replaced, shrank or changed
+    its header. Returns False when the snapshot is unavailable: NumPy is not
+    installed, the SQLite backend is active, another process holds the
+    snapshot's write lock or the update failed.
+    """
+    if _backend["name"] == 'sqlite':
+        return False
+    try:
+        import columnar_snapshot
+    except ImportError:
+        return False
     initialize_data_file()
-    with open(DATA_FILE, 'r', newline='', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        return list(reader)
\ No newline at end of file
+    try:
+        with columnar_snapshot.write_lock():
+            _update_snapshot(columnar_snapshot)
+    except (columnar_snapshot.SnapshotLocked, OSError, ValueError):
+        return False
+    return True
+
+def _update_snapshot(columnar_snapshot):
+    meta = columnar_snapshot.read_meta()
+    size = os.path.getsize(DATA_FILE)
+    if (
+        meta is None
+        or meta.get("source") != DATA_FILE
+        or meta.get("source_offset", 0) > size
+        or meta.get("header") != _read_header()
+        or meta.get("source_tail") != _source_tail(meta.get("source_offset", 0))
+    ):
+        rows, header, size = _read_csv()
+        columnar_snapshot.rebuild(rows, DATA_FILE, size, header or FIELDNAMES, _source_tail(size))
+        return
+    if meta["source_offset"] == size:
+        return
+    with open(DATA_FILE, 'rb') as f:
+        f.seek(meta["source_offset"])
+        raw = f.read()
+    end = raw.rfind(b'\n') + 1
+    if end:
+        offset = meta["source_offset"] + end
+        columnar_snapshot.append(_parse_rows(raw[:end], meta["header"]), meta, offset, _source_tail(offset))
+
+def load_snapshot():
+    """Refreshes the columnar snapshot and returns its memory-mapped columns, or None if unavailable.
+
+    Like load_cravings(), it also moves the read position to the end of the
+    rows it returns, so load_new_cravings() continues from there.
+    """
+    if not refresh_snapshot():
+        return None
+    import columnar_snapshot
+    columns = columnar_snapshot.load()
+    if columns is not None:
+        meta = columns["meta"]
+        _read_state.update(path=DATA_FILE, offset=meta["source_offset"], header=meta["header"])
+    return columns
@@ -1,33 +1,242 @@
+import logging
+import queue
 import smtplib
+import threading
+import time
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 import settings_manager
 
-def send_email(subject, body):
-    """Sends an email using the configured settings."""
-    settings = settings_manager.load_settings()
+logger = logging.getLogger(__name__)
+
+IDLE_TIMEOUT = 120.0        # close the session after this many seconds without mail
+NOOP_AFTER = 30.0           # check an idle session with NOOP before reusing it
+CONNECT_TIMEOUT = 30.0
+INITIAL_BACKOFF = 1.0
+MAX_BACKOFF = 60.0
+MAX_ATTEMPTS = 5
+SENT = "E-mail wysłany pomyślnie."
+# Failures that a new connection cannot fix.
+_PERMANENT_ERRORS = (
+    smtplib.SMTPAuthenticationError,
+    smtplib.SMTPRecipientsRefused,
+    smtplib.SMTPSenderRefused,
+    smtplib.SMTPNotSupportedError,
+)
+_STOP = object()
+_CHECK_SESSION = object()
+
+
+def _smtp_config(settings):
+    """Returns (server, port, user, password, recipient), or None if anything is missing."""
+    config = (
+        settings.get("smtp_server"),
+        settings.get("smtp_port"),
+        settings.get("smtp_user"),
+        settings.get("smtp_password"),
+        settings.get("recipient_email"),
+    )
+    return config if all(config) else None
+
+
+def build_message(sender, recipient, subject, body):
+    msg = MIMEMultipart()
+    msg['From'] = sender
+    msg['To'] = recipient
+    msg['Subject'] = subject
+    msg.attach(MIMEText(body, 'plain', 'utf-8'))
+    return msg
+
+
+class _Request:
+    """One queued message; it can be cancelled only while it is still waiting in the queue."""
+
+    __slots__ = ("subject", "body", "on_result", "max_attempts", "state")
+
+    def __init__(self, subject, body, on_result, max_attempts):
+        self.subject = subject
+        self.body = body
+        self.on_result = on_result
+        self.max_attempts = max_attempts
+        self.state = "queued"     # -> "sending" or "cancelled"
+
+
+class Mailer:
+    """Sends queued e-mails over one authenticated SMTP session kept open between messages.
+
+    A background thread drains the queue; the session is checked with NOOP
+    when it has been idle for a while, closed after IDLE_TIMEOUT without mail
+    and reopened with exponential backoff when the server drops it. The SMTP
+    class is injectable (smtp_factory) so the mailer can run against a local
+    stand-in server.
+    """
+
+    def __init__(self, load_settings=settings_manager.load_settings, smtp_factory=smtplib.SMTP,
+                 idle_timeout=IDLE_TIMEOUT, noop_after=NOOP_AFTER, initial_backoff=INITIAL_BACKOFF,
+                 max_backoff=MAX_BACKOFF, max_attempts=MAX_ATTEMPTS):
+        self._load_settings = load_settings
+        self._smtp_factory = smtp_factory
+        self.idle_timeout = idle_timeout
+        self.noop_after = noop_after
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        self.max_attempts = max_attempts
+        self._queue = queue.Queue()
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._server = None
+        self._server_key = None
+        self._last_used = 0.0
 
-    smtp_server = settings.get("smtp_server")
-    smtp_port = settings.get("smtp_port")
-    smtp_user = settings.get("smtp_user")
-    smtp_password = settings.get("smtp_password")
-    recipient_email = settings.get("recipient_email")
+    def submit(self, subject, body, on_result=None, max_attempts=None):
+        """Queues a message and returns its request; on_result(status) is called from the mailer thread once it is sent or failed.
 
-    if not all([smtp_server, smtp_port, smtp_user, smtp_password, recipient_email]):
-        return "Błąd: Ustawienia e-mail nie są w pełni skonfigurowane."
+        max_attempts overrides the number of connection attempts for this message.
+        """
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stopping.clear()
+                self._thread = threading.Thread(target=self._run, name="mailer", daemon=True)
+                self._thread.start()
+        request = _Request(subject, body, on_result, max_attempts)
+        self._queue.put(request)
+        return request
 
-    try:
-        msg = MIMEMultipart()
-        msg['From'] = smtp_user
-        msg['To'] = recipient_email
-        msg['Subject'] = subject
-        msg.attach(MIMEText(body, 'plain', 'utf-8'))
+    def send(self, subject, body, timeout=None, max_attempts=None):
+        """Sends a message through the queue and waits for its status string.
 
-        with smtplib.SMTP(smtp_server, smtp_port) as server:
+        If the message is still queued after timeout seconds it is withdrawn,
+        so it is never sent after the caller was told it failed; once its
+        delivery has started, send() waits for the outcome.
+        """
+        done = threading.Event()
+        result = []
+
+        def on_result(status):
+            result.append(status)
+            done.set()
+
+        request = self.submit(subject, body, on_result, max_attempts)
+        if not done.wait(timeout):
+            with self._lock:
+                if request.state == "queued":
+                    request.state = "cancelled"
+                    return "Błąd podczas wysyłania e-maila: przekroczono czas oczekiwania."
+            done.wait()
+        return result[0]
+
+    def settings_changed(self, settings):
+        """Settings subscriber: drops a session opened with outdated SMTP settings."""
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(_CHECK_SESSION)
+
+    def stop(self, timeout=None):
+        self._stopping.set()
+        self._queue.put(_STOP)
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout)
+
+    def _run(self):
+        while True:
+            wait = self.idle_timeout if self._server is not None else None
+            try:
+                item = self._queue.get(timeout=wait)
+            except queue.Empty:
+                self._disconnect()
+                continue
+            if item is _STOP:
+                self._disconnect()
+                return
+            if item is _CHECK_SESSION:
+                config = _smtp_config(self._load_settings())
+                if config is None or config[:4] != self._server_key:
+                    self._disconnect()
+                continue
+            with self._lock:
+                if item.state == "cancelled":
+                    continue
+                item.state = "sending"
+            try:
+                status = self._deliver(item.subject, item.body, item.max_attempts or self.max_attempts)
+            except Exception as e:
+                # send() may be waiting for this result, so it has to arrive.
+                logger.exception("Sending the e-mail failed")
+                self._disconnect()
+                status = f"Błąd podczas wysyłania e-maila: {e}"
+            if item.on_result is not None:
+                try:
+                    item.on_result(status)
+                except Exception:
+                    logger.exception("E-mail result callback failed")
+
+    def _deliver(self, subject, body, max_attempts):
+        config = _smtp_config(self._load_settings())
+        if config is None:
+            return "Błąd: Ustawienia e-mail nie są w pełni skonfigurowane."
+        smtp_server, smtp_port, smtp_user, smtp_password, recipient_email = config
+        msg = build_message(smtp_user, recipient_email, subject, body)
+        delay = self.initial_backoff
+        for attempt in range(1, max_attempts + 1):
+            try:
+                self._ensure_connected(config[:4])
+                self._server.send_message(msg)
+                self._last_used = time.monotonic()
+                return SENT
+            except _PERMANENT_ERRORS as e:
+                self._disconnect()
+                return f"Błąd podczas wysyłania e-maila: {e}"
+            except (smtplib.SMTPException, OSError) as e:
+                self._disconnect()
+                if attempt == max_attempts or self._stopping.wait(delay):
+                    return f"Błąd podczas wysyłania e-maila: {e}"
+                delay = min(delay * 2, self.max_backoff)
+
+    def _ensure_connected(self, key):
+        if self._server is not None and self._server_key != key:
+            # Settings changed since the session was opened.
+            self._disconnect()
+        if self._server is not None and time.monotonic() - self._last_used >= self.noop_after:
+            try:
+                code, _ = self._server.noop()
+            except (smtplib.SMTPException, OSError):
+                code = None
+            if code != 250:
+                self._disconnect()
+        if self._server is not None:
+            return
+        smtp_server, smtp_port, smtp_user, smtp_password = key
+        server = self._smtp_factory(smtp_server, smtp_port, timeout=CONNECT_TIMEOUT)
+        try:
             server.starttls()
             server.login(smtp_user, smtp_password)
-            server.send_message(msg)
+        except BaseException:
+            server.close()
+            raise
+        self._server, self._server_key = server, key
+        self._last_used = time.monotonic()
+
+    def _disconnect(self):
+        server, self._server, self._server_key = self._server, None, None
+        if server is None:
+            return
+        try:
+            server.quit()
+        except (smtplib.SMTPException, OSError):
+            server.close()
+
+
+_mailer = Mailer()
+settings_manager.subscribe(_mailer.settings_changed)
+
+def get_mailer():
+    return _mailer
+
+def send_email(subject, body):
+    """Sends an email using the configured settings."""
+    return _mailer.send(subject, body)
 
-        return "E-mail wysłany pomyślnie."
-    except Exception as e:
-        return f"Błąd podczas wysyłania e-maila: {e}"
\ No newline at end of file
+def stop_mailer():
+    settings_manager.unsubscribe(_mailer.settings_changed)
+    _mailer.stop(timeout=5)
@@ -0,0 +1,236 @@
+# Durable outbox: e-mails are spooled to disk and delivered in the background.
+#
+# Every message is one JSON file in OUTBOX_DIR, written atomically before
+# enqueue() returns, so mail that could not be delivered survives a restart
+# and is retried when the app starts again. A single worker thread hands the
+# messages to email_notifier's mailer; the UI never waits for SMTP and gets
+# results through callbacks, which it forwards to the Tk loop with root.after.
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+
+import email_notifier
+import settings_manager
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_DIR = 'outbox'
+FAILED_DIR = 'failed'       # subdirectory for messages that ran out of attempts
+RETRY_DELAY = 60.0          # seconds before the first retry, doubled after each failure
+MAX_RETRY_DELAY = 3600.0
+MAX_ATTEMPTS = 10
+# How long a message may wait in the mailer's queue (behind a slow delivery)
+# before the attempt is withdrawn and retried later; the mailer never sends a
+# withdrawn message, and one already being sent is waited for, so nothing is
+# delivered twice.
+SEND_TIMEOUT = 4 * email_notifier.CONNECT_TIMEOUT
+
+
+def _is_message(message):
+    return (
+        isinstance(message, dict)
+        and isinstance(message.get("id"), str)
+        and isinstance(message.get("subject"), str)
+        and isinstance(message.get("body"), str)
+        and isinstance(message.get("attempts"), int)
+        and isinstance(message.get("next_attempt"), (int, float))
+    )
+
+
+class Outbox:
+    """Spools messages to a directory and delivers them from one background thread.
+
+    on_result(message, status, delivered) callbacks passed to enqueue() or
+    registered with add_listener() are called from the outbox thread after
+    every delivery attempt.
+    """
+
+    def __init__(self, directory=OUTBOX_DIR, mailer=None, retry_delay=RETRY_DELAY,
+                 max_retry_delay=MAX_RETRY_DELAY, max_attempts=MAX_ATTEMPTS, send_timeout=SEND_TIMEOUT,
+                 now=time.time):
+        self.directory = directory
+        self._mailer = mailer
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.max_attempts = max_attempts
+        self.send_timeout = send_timeout
+        self._now = now
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self._stopped = False
+        self._retry_all = False
+        self._thread = None
+        self._callbacks = {}
+        self._listeners = []
+
+    def start(self):
+        """Starts the delivery thread; messages left from an earlier run are sent first."""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopped = False
+            self._thread = threading.Thread(target=self._run, name="email-outbox", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=None):
+        with self._lock:
+            self._stopped = True
+        self._wake.set()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout)
+
+    def add_listener(self, callback):
+        if callback not in self._listeners:
+            self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def enqueue(self, subject, body, on_result=None, retry=True, kind="message"):
+        """Writes the message to the spool and returns its id without waiting for delivery.
+
+        With retry=False the message is dropped after its first attempt, for
+        mail whose result only matters right away (like the test e-mail);
+        such messages are sent ahead of the rest of the queue.
+        """
+        message = {
+            "id": f"{time.time_ns():020d}-{uuid.uuid4().hex[:8]}",
+            "kind": kind,
+            "subject": subject,
+            "body": body,
+            "retry": retry,
+            "attempts": 0,
+            "next_attempt": 0,
+            "last_error": None,
+        }
+        os.makedirs(self.directory, exist_ok=True)
+        self._write(message)
+        if on_result is not None:
+            with self._lock:
+                self._callbacks[message["id"]] = on_result
+        self.start()
+        self._wake.set()
+        return message["id"]
+
+    def retry_now(self, *args):
+        """Makes every spooled message due at once, e.g. after the e-mail settings were fixed."""
+        with self._lock:
+            self._retry_all = True
+        self._wake.set()
+
+    def pending(self):
+        """Returns the spooled messages, oldest first."""
+        try:
+            names = sorted(name for name in os.listdir(self.directory) if name.endswith('.json'))
+        except OSError:
+            return []
+        messages = []
+        for name in names:
+            path = os.path.join(self.directory, name)
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    message = json.load(f)
+            except FileNotFoundError:
+                continue
+            except (OSError, json.JSONDecodeError, UnicodeDecodeError):
+                message = None
+            if not _is_message(message):
+                # Keep a damaged file for inspection, but out of the queue.
+                os.replace(path, f"{path}.bad")
+                continue
+            messages.append(message)
+        return messages
+
+    def _path(self, message_id):
+        return os.path.join(self.directory, f"{message_id}.json")
+
+    def _write(self, message):
+        path = self._path(message["id"])
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(message, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+
+    def _remove(self, message):
+        try:
+            os.remove(self._path(message["id"]))
+        except FileNotFoundError:
+            pass
+
+    def _give_up(self, message):
+        failed_dir = os.path.join(self.directory, FAILED_DIR)
+        os.makedirs(failed_dir, exist_ok=True)
+        os.replace(self._path(message["id"]), os.path.join(failed_dir, f"{message['id']}.json"))
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if self._stopped:
+                    return
+                retry_all, self._retry_all = self._retry_all, False
+            self._wake.clear()
+            now = self._now()
+            messages = self.pending()
+            if retry_all:
+                # Only this thread rewrites spooled messages, so this cannot race a delivery.
+                for message in messages:
+                    if message["next_attempt"] > now:
+                        message["next_attempt"] = now
+                        self._write(message)
+            due = [message for message in messages if message["next_attempt"] <= now]
+            if not due:
+                waits = [message["next_attempt"] - now for message in messages]
+                self._wake.wait(min(waits) if waits else None)
+                continue
+            # Sending one message at a time lets stop() and new mail interleave;
+            # messages without retries (interactive ones) go first.
+            self._attempt(min(due, key=lambda message: (message.get("retry", True), message["id"])))
+
+    def _attempt(self, message):
+        mailer = self._mailer or email_notifier.get_mailer()
+        # The outbox does its own retries, so the mailer tries to connect only once.
+        status = mailer.send(message["subject"], message["body"], timeout=self.send_timeout, max_attempts=1)
+        delivered = status == email_notifier.SENT
+        message["attempts"] += 1
+        if delivered or not message.get("retry", True):
+            self._remove(message)
+        elif message["attempts"] >= self.max_attempts:
+            message["last_error"] = status
+            self._write(message)
+            self._give_up(message)
+        else:
+            message["last_error"] = status
+            delay = min(self.retry_delay * 2 ** (message["attempts"] - 1), self.max_retry_delay)
+            message["next_attempt"] = self._now() + delay
+            self._write(message)
+        with self._lock:
+            callback = self._callbacks.pop(message["id"], None)
+        for listener in [callback, *self._listeners]:
+            if listener is None:
+                continue
+            try:
+                listener(message, status, delivered)
+            except Exception:
+                logger.exception("E-mail result listener failed")
+
+
+_outbox = Outbox()
+
+def get_outbox():
+    return _outbox
+
+def start():
+    """Starts delivering spooled mail, and retries it whenever the settings are saved."""
+    settings_manager.subscribe(_outbox.retry_now)
+    _outbox.start()
+
+def stop():
+    settings_manager.unsubscribe(_outbox.retry_now)
+    _outbox.stop(timeout=5)
@@ -5,17 +5,31 @@ import data_manager
 import analysis
 import settings_manager
 import email_notifier
+import email_outbox
 import reminder_scheduler
 import symptoms
 import calendar_marks_manager
+from calendar_canvas import CalendarCanvas
+from streamlit_server import StreamlitServer
+import startup_probe
 from datetime import datetime
 import calendar
-import subprocess
-import pandas as pd
+
+
+def add_months(value, months):
+    """Shifts a date by whole months, clamping the day to the target month's length."""
+    month_index = value.year * 12 + value.month - 1 + months
+    year, month = divmod(month_index, 12)
+    month += 1
+    return value.replace(year=year, month=month, day=min(value.day, calendar.monthrange(year, month)[1]))
+
 
 class CravingApp:
     _ENTRY_TS_KEY = "_timestamp_dt"
     _ENTRY_TRIGGERS_KEY = "_triggers_list"
+    _ENTRY_MASK_KEY = "_symptom_mask"
+    _MAX_DAYS_IN_MONTH = 31
+    _LAYOUT_FRAME_MS = 16
 
     def __init__(self, root):
         self.root = root
@@ -34,10 +48,23 @@ class CravingApp:
         self._resizer_width = 6
         self._calendar_cells = []
         self._cell_map = {}
+        self._day_buttons = {}
+        self._visible_day_columns = 0
+        self._dirty_cells = set()
+        self._layout_job = None
+        self._applied_layout = None
         self._current_month_triggers = {}
         self._raw_entries = []
         self._enriched_entries = []
+        # Summary statistics, rolling windows and plot data are computed off the
+        # main thread; each entry change bumps the data version.
+        self._analysis_worker = analysis.AnalysisWorker(self._publish_analysis)
+        self._analysis_version = 0
+        self._analysis_shown_version = None
+        self.intensity_plot = None
         self._month_trigger_cache = {}
+        self.calendar_renderer = "labels"
+        self._calendar_canvas = None
 
         # --- Main Layout ---
         self.style = ttk.Style()
@@ -52,15 +79,40 @@ class CravingApp:
         self.notebook.add(self.journal_frame, text='Kalendarz Głodów')
         self.notebook.add(self.analysis_frame, text='Analiza')
         self.notebook.add(self.settings_frame, text='Ustawienia')
+        self.notebook.bind("<<NotebookTabChanged>>", self._on_tab_changed)
 
         self.create_journal_widgets()
         self.create_analysis_widgets()
         self.create_settings_widgets()
 
+        self.viewer_server = StreamlitServer("viewer.py")
         self.load_app_settings()
+        settings_manager.subscribe(self._on_settings_changed)
         self.load_entries()
+        # A timing run must not send spooled mail or start the viewer server.
+        if not startup_probe.enabled():
+            self._start_background_services()
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+
+    def _start_background_services(self):
+        if settings_manager.load_settings().get("viewer_prewarm"):
+            # Start the viewer once the window is up, so the first click only opens the browser.
+            self.root.after_idle(self._prewarm_viewer)
+        email_outbox.get_outbox().add_listener(self._on_email_result)
+        email_outbox.start()
         reminder_scheduler.start_scheduler_thread()
 
+    def on_close(self):
+        self._analysis_worker.stop()
+        calendar_marks_manager.flush()
+        settings_manager.unsubscribe(self._on_settings_changed)
+        reminder_scheduler.stop_scheduler()
+        email_outbox.get_outbox().remove_listener(self._on_email_result)
+        email_outbox.stop()
+        email_notifier.stop_mailer()
+        self.viewer_server.stop()
+        self.root.destroy()
+
     def _update_font_cache(self):
         base_size = max(12, int(self.font_size))
         title_size = max(base_size + 4, 16)
@@ -89,8 +141,11 @@ class CravingApp:
         self.calendar_frame.bind("<Configure>", self._on_calendar_resize)
 
     def draw_calendar_view(self):
-        for widget in self.calendar_frame.winfo_children():
-            widget.destroy()
+        if self.calendar_renderer == "canvas":
+            self._draw_canvas_calendar()
+            return
+        if not self._calendar_grid_built():
+            self._build_calendar_grid()
         self.month_year_label.config(text=self.current_date.strftime("%B %Y"))
 
         month_day_triggers = self._get_month_trigger_lookup(self.current_date)
@@ -98,10 +153,35 @@ class CravingApp:
 
         days_in_month = calendar.monthrange(self.current_date.year, self.current_date.month)[1]
         self._days_in_current_month = days_in_month
+        self._show_day_columns(days_in_month)
+        self._dirty_cells.clear()
+
+        for (symptom, day_num), cell in self._cell_map.items():
+            if day_num <= days_in_month:
+                self._apply_cell_visuals(symptom, day_num, cell)
+
+        self.calendar_frame.after_idle(lambda: self._on_calendar_resize(None))
+
+    def _calendar_grid_built(self):
+        header_label = getattr(self, "_symptom_header_label", None)
+        return bool(self._cell_map) and header_label is not None and header_label.winfo_exists()
+
+    def _build_calendar_grid(self):
+        """Creates the label grid once, sized for the longest month.
+
+        Month navigation only shows or hides the trailing day columns and
+        repaints the cells, so widgets are never rebuilt after this.
+        """
+        self._calendar_canvas = None
+        for widget in self.calendar_frame.winfo_children():
+            widget.destroy()
 
         self.symptom_labels = []
         self._calendar_cells = []
         self._cell_map = {}
+        self._day_buttons = {}
+        self._visible_day_columns = self._MAX_DAYS_IN_MONTH
+        self._applied_layout = None
 
         header_label = ttk.Label(
             self.calendar_frame,
@@ -122,15 +202,15 @@ class CravingApp:
         resizer.bind("<ButtonRelease-1>", self.finish_resizing_symptom_column)
         self._symptom_header_label = header_label
 
-        for day_num in range(1, days_in_month + 1):
-            date = datetime(self.current_date.year, self.current_date.month, day_num)
+        for day_num in range(1, self._MAX_DAYS_IN_MONTH + 1):
             day_button = ttk.Button(
                 self.calendar_frame,
                 text=str(day_num),
-                command=lambda d=date: self.open_new_entry_window(d)
+                command=lambda d=day_num: self._open_new_entry_for_day(d)
             )
             day_button.configure(style="Day.TButton")
             day_button.grid(row=0, column=day_num + 1, sticky="nsew")
+            self._day_buttons[day_num] = day_button
 
         for i, symptom in enumerate(symptoms.SYMPTOM_LIST, start=1):
             symptom_label = ttk.Label(
@@ -145,7 +225,7 @@ class CravingApp:
             )
             symptom_label.grid(row=i, column=0, sticky="nsew")
             self.symptom_labels.append(symptom_label)
-            for day_num in range(1, days_in_month + 1):
+            for day_num in range(1, self._MAX_DAYS_IN_MONTH + 1):
                 cell = tk.Label(
                     self.calendar_frame,
                     relief="solid",
@@ -159,17 +239,73 @@ class CravingApp:
                 cell.bind("<Leave>", lambda e, c=cell: self._on_cell_leave(c))
                 self._calendar_cells.append(cell)
                 self._cell_map[(symptom, day_num)] = cell
-                self._apply_cell_visuals(symptom, day_num, cell)
 
         self.calendar_frame.grid_columnconfigure(0, weight=0, minsize=self.symptom_column_width)
         self.calendar_frame.grid_columnconfigure(1, weight=0, minsize=self._resizer_width)
-        for col in range(2, days_in_month + 2):
+        for col in range(2, self._MAX_DAYS_IN_MONTH + 2):
             self.calendar_frame.grid_columnconfigure(col, weight=1, uniform="group1")
         for row in range(len(symptoms.SYMPTOM_LIST) + 1):
             self.calendar_frame.grid_rowconfigure(row, weight=1, uniform="group1")
         self._apply_current_fonts()
 
-        self.calendar_frame.after_idle(lambda: self._on_calendar_resize(None))
+    def _show_day_columns(self, days_in_month):
+        if days_in_month == self._visible_day_columns:
+            return
+        for day_num in range(1, self._MAX_DAYS_IN_MONTH + 1):
+            visible = day_num <= days_in_month
+            if visible == (day_num <= self._visible_day_columns):
+                continue
+            widgets = [self._day_buttons[day_num]]
+            widgets.extend(self._cell_map[(symptom, day_num)] for symptom in symptoms.SYMPTOM_LIST)
+            for widget in widgets:
+                if visible:
+                    widget.grid()
+                else:
+                    widget.grid_remove()
+            # Empty columns would otherwise keep their share of the uniform group.
+            if visible:
+                self.calendar_frame.grid_columnconfigure(day_num + 1, weight=1, uniform="group1")
+            else:
+                self.calendar_frame.grid_columnconfigure(day_num + 1, weight=0, uniform="", minsize=0)
+        self._visible_day_columns = days_in_month
+
+    def _draw_canvas_calendar(self):
+        self.month_year_label.config(text=self.current_date.strftime("%B %Y"))
+        self._current_month_triggers = self._get_month_trigger_lookup(self.current_date)
+        days_in_month = calendar.monthrange(self.current_date.year, self.current_date.month)[1]
+        self._days_in_current_month = days_in_month
+        self._dirty_cells.clear()
+        if self._calendar_canvas is None or not self._calendar_canvas.winfo_exists():
+            for widget in self.calendar_frame.winfo_children():
+                widget.destroy()
+            self.symptom_labels = []
+            self._calendar_cells = []
+            self._cell_map = {}
+            self._day_buttons = {}
+            self._visible_day_columns = 0
+            self._symptom_header_label = None
+            self._calendar_canvas = CalendarCanvas(
+                self.calendar_frame,
+                symptoms.SYMPTOM_LIST,
+                cell_state=self._cell_visual_state,
+                hover_color=self._calculate_hover_color,
+                on_cell_click=self.handle_cell_click,
+                on_cell_menu=self.open_cell_menu,
+                on_day_click=self._open_new_entry_for_day,
+                on_column_resize=self._on_canvas_column_resize,
+                symptom_column_width=self.symptom_column_width,
+                resizer_width=self._resizer_width,
+                header_text="Objaw / Wyzwalacz",
+            )
+            self._calendar_canvas.pack(fill="both", expand=True)
+            self._calendar_canvas.set_fonts(self._get_font(), self._get_font(weight="bold"))
+        self._calendar_canvas.show_month(days_in_month)
+
+    def _open_new_entry_for_day(self, day_num):
+        self.open_new_entry_window(datetime(self.current_date.year, self.current_date.month, day_num))
+
+    def _on_canvas_column_resize(self, width):
+        self.symptom_column_width = width
 
     def handle_cell_click(self, event, symptom, day_num):
         if event:
@@ -177,13 +313,13 @@ class CravingApp:
         date = datetime(self.current_date.year, self.current_date.month, day_num)
         date_str = date.strftime("%Y-%m-%d")
         if calendar_marks_manager.is_marked(date_str, symptom, self.cell_marks):
-            previous_value = calendar_marks_manager.get_template(date_str, symptom, self.cell_marks)
+            previous_value = calendar_marks_manager.get_scale(date_str, symptom, self.cell_marks)
             self.cell_marks = calendar_marks_manager.remove_mark(date_str, symptom, self.cell_marks)
-            self.draw_calendar_view()
+            self._refresh_mark_cell(date_str, symptom)
             self.open_cell_menu(event, symptom, day_num, date_str=date_str, previous_value=previous_value)
         else:
             self.cell_marks = calendar_marks_manager.set_mark(date_str, symptom, marks=self.cell_marks)
-        self._apply_cell_visuals(symptom, day_num)
+            self._refresh_mark_cell(date_str, symptom)
 
     def open_cell_menu(self, event, symptom, day_num, date_str=None, previous_value=None):
         if date_str is None:
@@ -225,15 +361,16 @@ class CravingApp:
         new_width = max(80, self._initial_symptom_width + delta)
         self.symptom_column_width = new_width
         self.calendar_frame.grid_columnconfigure(0, minsize=self.symptom_column_width)
-        wrap_value = max(10, self.symptom_column_width - 10)
-        if hasattr(self, "_symptom_header_label"):
-            self._symptom_header_label.configure(wraplength=wrap_value)
-        for label in getattr(self, "symptom_labels", []):
-            label.configure(wraplength=wrap_value)
         self._on_calendar_resize(None)
 
     def finish_resizing_symptom_column(self, event):
         self._resizing_symptom_column = False
+        # Re-wrapping every symptom label is deferred until the drag ends.
+        wrap_value = max(10, self.symptom_column_width - 10)
+        if getattr(self, "_symptom_header_label", None) is not None:
+            self._symptom_header_label.configure(wraplength=wrap_value)
+        for label in getattr(self, "symptom_labels", []):
+            label.configure(wraplength=wrap_value)
 
     def _on_cell_enter(self, cell):
         original_bg = getattr(cell, "original_bg", cell.cget("bg"))
@@ -269,8 +406,14 @@ class CravingApp:
         return f"#{hover_r:02x}{hover_g:02x}{hover_b:02x}"
 
     def _on_calendar_resize(self, event):
+        """Coalesces bursts of <Configure> and resizer events into one layout pass per frame."""
+        if self._layout_job is None:
+            self._layout_job = self.calendar_frame.after(self._LAYOUT_FRAME_MS, self._layout_calendar)
+
+    def _layout_calendar(self):
+        self._layout_job = None
         days_in_month = getattr(self, "_days_in_current_month", 0)
-        if not days_in_month:
+        if not days_in_month or self._calendar_canvas is not None:
             return
         total_width = max(1, self.calendar_frame.winfo_width())
         total_height = max(1, self.calendar_frame.winfo_height())
@@ -280,13 +423,14 @@ class CravingApp:
         available_width = max(1, total_width - self.symptom_column_width - self._resizer_width)
         available_height = max(1, total_height)
         cell_size = min(available_width / days_in_month, available_height / row_count)
-        cell_size = max(1, cell_size)
+        cell_size = int(max(1, cell_size))
+        if self._applied_layout == (days_in_month, cell_size):
+            return
+        self._applied_layout = (days_in_month, cell_size)
         for col in range(2, days_in_month + 2):
-            self.calendar_frame.grid_columnconfigure(col, minsize=int(cell_size))
+            self.calendar_frame.grid_columnconfigure(col, minsize=cell_size)
         for row in range(0, len(symptoms.SYMPTOM_LIST) + 1):
-            self.calendar_frame.grid_rowconfigure(row, minsize=int(cell_size))
-        for cell in getattr(self, "_calendar_cells", []):
-            cell.original_bg = cell.original_bg if hasattr(cell, "original_bg") else cell.cget("bg")
+            self.calendar_frame.grid_rowconfigure(row, minsize=cell_size)
 
     def _normalize_font_size(self, value):
         try:
@@ -311,34 +455,45 @@ class CravingApp:
             self.month_year_label.configure(font=self._get_title_font())
         if hasattr(self, "style"):
             self.style.configure("Day.TButton", font=self._get_font())
-        if hasattr(self, "_symptom_header_label"):
+        if getattr(self, "_symptom_header_label", None) is not None:
             self._symptom_header_label.configure(font=self._get_font(weight="bold"))
         for label in getattr(self, "symptom_labels", []):
             label.configure(font=self._get_font())
         for cell in getattr(self, "_calendar_cells", []):
             cell.configure(font=self._get_font())
+        if self._calendar_canvas is not None:
+            self._calendar_canvas.set_fonts(self._get_font(), self._get_font(weight="bold"))
 
-    def _apply_cell_visuals(self, symptom, day_num, cell=None):
-        if cell is None:
-            cell = self._cell_map.get((symptom, day_num))
-        if cell is None:
-            return
-        date = datetime(self.current_date.year, self.current_date.month, day_num)
-        date_str = date.strftime("%Y-%m-%d")
-        mark_data = calendar_marks_manager.get_mark(date_str, symptom, self.cell_marks)
+    def _cell_visual_state(self, symptom, day_num):
+        """Returns (background, foreground, text) for one calendar cell."""
+        month_marks = calendar_marks_manager.get_month_marks(
+            self.current_date.year, self.current_date.month, self.cell_marks
+        )
+        mark_data = month_marks.get((day_num, symptom))
         cell_color = "#f0f0f0"
         text_color = "#000000"
         cell_text = ""
         if mark_data is not None:
-            scale_value = mark_data.get("scale")
+            scale_value = mark_data.scale
             cell_color = self.mark_background
             text_color = self.mark_foreground
             cell_text = scale_value if scale_value else "✓"
-        triggers_for_day = self._current_month_triggers.get(day_num)
-        if triggers_for_day and symptom in triggers_for_day and mark_data is None:
+        triggers_for_day = self._current_month_triggers.get(day_num, 0)
+        if triggers_for_day & symptoms.SYMPTOM_BITS.get(symptom, 0) and mark_data is None:
             cell_color = "#ffb3b3"
-        self._update_font_cache()
-        cell.configure(bg=cell_color, fg=text_color, text=cell_text, font=self._get_font())
+        return cell_color, text_color, cell_text
+
+    def _apply_cell_visuals(self, symptom, day_num, cell=None):
+        if self._calendar_canvas is not None:
+            self._calendar_canvas.update_cell(symptom, day_num)
+            return
+        if cell is None:
+            cell = self._cell_map.get((symptom, day_num))
+        if cell is None:
+            return
+        cell_color, text_color, cell_text = self._cell_visual_state(symptom, day_num)
+        # Fonts are shared tkfont.Font objects applied once in _apply_current_fonts.
+        cell.configure(bg=cell_color, fg=text_color, text=cell_text)
         try:
             initial_thickness = int(cell.cget("highlightthickness") or 0)
         except (ValueError, tk.TclError, TypeError):
@@ -351,37 +506,53 @@ class CravingApp:
 
     def add_basic_mark(self, date_str, symptom):
         self.cell_marks = calendar_marks_manager.set_mark(date_str, symptom, marks=self.cell_marks)
-        try:
-            day_num = int(date_str.split('-')[2])
-        except (IndexError, ValueError):
-            self.draw_calendar_view()
-            return
-        self._apply_cell_visuals(symptom, day_num)
+        self._refresh_mark_cell(date_str, symptom)
 
     def assign_scale(self, date_str, symptom, scale):
         self.cell_marks = calendar_marks_manager.update_mark(date_str, symptom, scale=scale, marks=self.cell_marks)
-        try:
-            day_num = int(date_str.split('-')[2])
-        except (IndexError, ValueError):
-            self.draw_calendar_view()
-            return
-        self._apply_cell_visuals(symptom, day_num)
+        self._refresh_mark_cell(date_str, symptom)
 
     def remove_cell_mark(self, date_str, symptom):
         self.cell_marks = calendar_marks_manager.remove_mark(date_str, symptom, self.cell_marks)
+        self._refresh_mark_cell(date_str, symptom)
+
+    def _refresh_mark_cell(self, date_str, symptom):
         try:
-            day_num = int(date_str.split('-')[2])
-        except (IndexError, ValueError):
+            year, month, day_num = (int(part) for part in date_str.split('-'))
+        except ValueError:
             self.draw_calendar_view()
             return
-        self._apply_cell_visuals(symptom, day_num)
+        self._invalidate_cells(year, month, [(symptom, day_num)])
+        self._repaint_dirty_cells()
+
+    def _invalidate_cells(self, year, month, cells):
+        """Records (symptom, day) cells of a month whose visuals changed.
+
+        Cells of months that are not on screen are skipped; they are painted
+        when the month is navigated to.
+        """
+        if (year, month) != (self.current_date.year, self.current_date.month):
+            return
+        self._dirty_cells.update(cells)
+
+    def _repaint_dirty_cells(self):
+        dirty_cells, self._dirty_cells = self._dirty_cells, set()
+        days_in_month = getattr(self, "_days_in_current_month", 0)
+        for symptom, day_num in dirty_cells:
+            if day_num <= days_in_month:
+                self._apply_cell_visuals(symptom, day_num)
+
+    def _calendar_view_ready(self):
+        if self.calendar_renderer == "canvas":
+            return self._calendar_canvas is not None and self._calendar_canvas.winfo_exists()
+        return self._calendar_grid_built()
 
     def prev_month(self):
-        self.current_date -= pd.DateOffset(months=1)
+        self.current_date = add_months(self.current_date, -1)
         self.draw_calendar_view()
 
     def next_month(self):
-        self.current_date += pd.DateOffset(months=1)
+        self.current_date = add_months(self.current_date, 1)
         self.draw_calendar_view()
 
     def open_new_entry_window(self, date):
@@ -419,13 +590,13 @@ class CravingApp:
             self.selected_symptoms = [symptom_text for var, symptom_text in vars if var.get()]
             self.symptoms_display.config(state="normal")
             self.symptoms_display.delete(1.0, tk.END)
-            self.symptoms_display.insert(tk.END, ", ".join(self.selected_symptoms))
+            self.symptoms_display.insert(tk.END, symptoms.TRIGGER_SEPARATOR.join(self.selected_symptoms))
             self.symptoms_display.config(state="disabled")
             selector_window.destroy()
         ttk.Button(selector_window, text="Zatwierdź", command=confirm_selection).pack(pady=10)
 
     def save_entry(self, date, intensity, coping, drank):
-        triggers = ", ".join(self.selected_symptoms)
+        triggers = symptoms.TRIGGER_SEPARATOR.join(self.selected_symptoms)
         if not intensity.isdigit() or not 1 <= int(intensity) <= 10:
             messagebox.showerror("Błąd", "Intensywność musi być liczbą od 1 do 10.")
             return
@@ -435,7 +606,8 @@ class CravingApp:
         now = datetime.now()
         timestamp_obj = date.replace(hour=now.hour, minute=now.minute, second=now.second)
         timestamp = timestamp_obj.strftime("%Y-%m-%d %H:%M:%S")
-        entry_data = {'timestamp': timestamp, 'intensity': intensity, 'triggers': triggers, 'coping_mechanism': coping, 'drank': 'Tak' if drank else 'Nie'}
+        symptom_mask = symptoms.mask_from_symptoms(self.selected_symptoms)
+        entry_data = {'timestamp': timestamp, 'intensity': intensity, 'triggers': triggers, 'coping_mechanism': coping, 'drank': 'Tak' if drank else 'Nie', 'symptom_mask': str(symptom_mask)}
         data_manager.save_craving(entry_data)
         self.load_entries()
         self.clear_fields()
@@ -449,8 +621,25 @@ class CravingApp:
             self.symptoms_display.config(state="disabled")
 
     def load_entries(self):
-        self._refresh_entries()
-        self.draw_calendar_view()
+        new_entries = self._refresh_entries()
+        if new_entries is None or not self._calendar_view_ready():
+            self.draw_calendar_view()
+            self.update_analysis_tab()
+            return
+        if not new_entries:
+            return
+        for entry in new_entries:
+            timestamp = entry[self._ENTRY_TS_KEY]
+            if timestamp is None:
+                continue
+            day_cells = [
+                (symptom, timestamp.day)
+                for symptom in symptoms.symptoms_from_mask(entry[self._ENTRY_MASK_KEY])
+            ]
+            self._invalidate_cells(timestamp.year, timestamp.month, day_cells)
+        if self._dirty_cells:
+            self._current_month_triggers = self._get_month_trigger_lookup(self.current_date)
+            self._repaint_dirty_cells()
         self.update_analysis_tab()
 
     def create_analysis_widgets(self):
@@ -470,6 +659,11 @@ class CravingApp:
         self.sequence_label.grid(row=5, column=0, padx=5, pady=2, sticky="w")
         self.weekday_weekend_label = ttk.Label(stats_frame, text="Dni robocze vs weekend: N/A")
         self.weekday_weekend_label.grid(row=6, column=0, padx=5, pady=2, sticky="w")
+        self.rolling_labels = {}
+        for row, days in enumerate(analysis.ROLLING_WINDOWS, start=7):
+            label = ttk.Label(stats_frame, text=f"Ostatnie {days} dni: N/A")
+            label.grid(row=row, column=0, padx=5, pady=2, sticky="w")
+            self.rolling_labels[days] = label
         self.plot_frame = ttk.LabelFrame(self.analysis_frame, text="Wykres Intensywności")
         self.plot_frame.grid(row=1, column=0, padx=10, pady=10, sticky="nsew")
         ttk.Button(self.analysis_frame, text="Uruchom Zaawansowany Panel Analizy (Streamlit)", command=self.launch_streamlit).grid(row=2, column=0, pady=20)
@@ -477,8 +671,27 @@ class CravingApp:
         self.analysis_frame.rowconfigure(1, weight=1)
 
     def update_analysis_tab(self):
-        entries = list(self._raw_entries)
-        stats = analysis.get_summary_stats(entries)
+        """Asks the analysis worker for fresh results if the tab is visible and out of date."""
+        if self._analysis_tab_visible() and self._analysis_shown_version != self._analysis_version:
+            self._analysis_worker.request()
+
+    def _analysis_tab_visible(self):
+        return self.notebook.select() == str(self.analysis_frame)
+
+    def _on_tab_changed(self, event=None):
+        self.update_analysis_tab()
+
+    def _publish_analysis(self, version, result):
+        # Runs on the worker thread; Tk widgets are only touched from the main loop.
+        try:
+            self.root.after(0, self._apply_analysis, version, result)
+        except (RuntimeError, tk.TclError):
+            pass
+
+    def _apply_analysis(self, version, result):
+        if version != self._analysis_version:
+            return
+        stats = result["stats"]
         self.total_entries_label.config(text=f"Liczba wpisów: {stats['total_entries']}")
         self.avg_intensity_label.config(text=f"Średnia intensywność: {stats['avg_intensity']}")
         self.common_trigger_label.config(text=f"Najczęstszy wyzwalacz: {stats['most_common_trigger']}")
@@ -489,13 +702,36 @@ class CravingApp:
         self.weekday_weekend_label.config(
             text=f"Dni robocze vs weekend: {distribution.get('workdays', 0)} / {distribution.get('weekend', 0)}"
         )
-        analysis.create_intensity_plot(self.plot_frame, entries)
+        for days, label in self.rolling_labels.items():
+            window = result["rolling"][days]
+            avg_intensity = f"{window['avg_intensity']:.2f}" if window['avg_intensity'] is not None else "N/A"
+            label.config(
+                text=(
+                    f"Ostatnie {days} dni: {window['entries']} wpisów ({window['entries_per_day']:.2f} dziennie), "
+                    f"średnia intensywność: {avg_intensity}, spożycie: {window['drinks']}"
+                )
+            )
+        # matplotlib is only loaded once the analysis tab has been shown.
+        if self.intensity_plot is None:
+            self.intensity_plot = analysis.IntensityPlot(self.plot_frame)
+        self.intensity_plot.set_points(result["plot_points"])
+        self._analysis_shown_version = version
 
     def launch_streamlit(self):
+        self.viewer_server.open(on_error=self._show_viewer_error)
+
+    def _show_viewer_error(self, message):
+        # May be called from the server's watcher thread.
+        try:
+            self.root.after(0, messagebox.showerror, "Błąd", message)
+        except (RuntimeError, tk.TclError):
+            pass
+
+    def _prewarm_viewer(self):
         try:
-            subprocess.Popen(["streamlit", "run", "viewer.py"])
+            self.viewer_server.start()
         except FileNotFoundError:
-            messagebox.showerror("Błąd", "Nie można uruchomić Streamlit. Upewnij się, że jest zainstalowany i dostępny w PATH.")
+            pass
 
     def create_settings_widgets(self):
         email_settings_frame = ttk.LabelFrame(self.settings_frame, text="Ustawienia E-mail (SMTP)")
@@ -516,8 +752,16 @@ class CravingApp:
         reminder_frame.grid(row=1, column=0, padx=10, pady=10, sticky="ew")
         self.reminders_enabled_var, self.reminder_time_var = tk.BooleanVar(), tk.StringVar()
         ttk.Checkbutton(reminder_frame, text="Włącz codzienne przypomnienia", variable=self.reminders_enabled_var).grid(row=0, column=0, columnspan=2, padx=5, pady=5, sticky="w")
-        ttk.Label(reminder_frame, text="Godzina przypomnienia (HH:MM):").grid(row=1, column=0, padx=5, pady=5, sticky="w")
+        ttk.Label(reminder_frame, text="Godziny przypomnień (HH:MM, oddzielone przecinkami):").grid(row=1, column=0, padx=5, pady=5, sticky="w")
         ttk.Entry(reminder_frame, textvariable=self.reminder_time_var).grid(row=1, column=1, padx=5, pady=5, sticky="w")
+        ttk.Label(reminder_frame, text="Dni tygodnia:").grid(row=2, column=0, padx=5, pady=5, sticky="w")
+        weekdays_frame = ttk.Frame(reminder_frame)
+        weekdays_frame.grid(row=2, column=1, padx=5, pady=5, sticky="w")
+        self.reminder_weekday_vars = []
+        for day, name in enumerate(["Pn", "Wt", "Śr", "Cz", "Pt", "So", "Nd"]):
+            var = tk.BooleanVar(value=True)
+            ttk.Checkbutton(weekdays_frame, text=name, variable=var).grid(row=0, column=day, padx=2, sticky="w")
+            self.reminder_weekday_vars.append(var)
         appearance_frame = ttk.LabelFrame(self.settings_frame, text="Wygląd")
         appearance_frame.grid(row=2, column=0, padx=10, pady=10, sticky="ew")
         ttk.Label(appearance_frame, text="Rozmiar czcionki (12-36):").grid(row=0, column=0, padx=5, pady=5, sticky="w")
@@ -532,6 +776,12 @@ class CravingApp:
             wrap=False
         )
         self.font_size_spinbox.grid(row=0, column=1, padx=5, pady=5, sticky="w")
+        self.canvas_renderer_var = tk.BooleanVar(value=self.calendar_renderer == "canvas")
+        ttk.Checkbutton(
+            appearance_frame,
+            text="Rysuj kalendarz na jednym płótnie (szybsze przy dużej liczbie komórek)",
+            variable=self.canvas_renderer_var
+        ).grid(row=1, column=0, columnspan=2, padx=5, pady=5, sticky="w")
         appearance_frame.columnconfigure(1, weight=1)
         ttk.Button(self.settings_frame, text="Zapisz Ustawienia", command=self.save_app_settings).grid(row=3, column=0, padx=10, pady=10)
         ttk.Button(self.settings_frame, text="Wyślij E-mail Testowy", command=self.send_test_email_action).grid(row=4, column=0, padx=10, pady=10)
@@ -544,8 +794,17 @@ class CravingApp:
         self.smtp_password_var.set(settings.get("smtp_password", ""))
         self.recipient_email_var.set(settings.get("recipient_email", ""))
         self.reminders_enabled_var.set(settings.get("reminders_enabled", False))
-        self.reminder_time_var.set(settings.get("reminder_time", "20:00"))
+        self.reminder_time_var.set(", ".join(
+            f"{hour:02d}:{minute:02d}" for hour, minute in reminder_scheduler.reminder_times(settings)
+        ))
+        weekdays = reminder_scheduler.reminder_weekdays(settings)
+        for day, var in enumerate(self.reminder_weekday_vars):
+            var.set(day in weekdays)
         self.font_size = self._normalize_font_size(settings.get("font_size", self.font_size))
+        data_manager.set_backend(settings.get("storage_backend", "csv"))
+        analysis.set_backend(settings.get("analysis_backend", "python"))
+        self.calendar_renderer = "canvas" if settings.get("calendar_renderer") == "canvas" else "labels"
+        self.canvas_renderer_var.set(self.calendar_renderer == "canvas")
         if hasattr(self, "font_size_var"):
             self.font_size_var.set(self.font_size)
         self._apply_current_fonts()
@@ -556,39 +815,81 @@ class CravingApp:
         except ValueError:
             messagebox.showerror("Błąd", "Port SMTP musi być liczbą.")
             return
+        reminder_times = [part.strip() for part in self.reminder_time_var.get().split(",") if part.strip()]
+        if not reminder_times or any(reminder_scheduler.parse_reminder_time(value) is None for value in reminder_times):
+            messagebox.showerror("Błąd", "Podaj godziny przypomnień w formacie HH:MM, oddzielone przecinkami.")
+            return
+        reminder_times = [
+            "{:02d}:{:02d}".format(*reminder_scheduler.parse_reminder_time(value)) for value in reminder_times
+        ]
         font_size_value = self._normalize_font_size(self.font_size_var.get() if hasattr(self, 'font_size_var') else self.font_size)
         self.font_size = font_size_value
-        settings = {
+        settings = dict(settings_manager.load_settings())
+        settings.update({
             "smtp_server": self.smtp_server_var.get(),
             "smtp_port": port,
             "smtp_user": self.smtp_user_var.get(),
             "smtp_password": self.smtp_password_var.get(),
             "recipient_email": self.recipient_email_var.get(),
             "reminders_enabled": self.reminders_enabled_var.get(),
-            "reminder_time": self.reminder_time_var.get(),
+            "reminder_time": reminder_times[0],
+            "reminder_times": reminder_times,
+            "reminder_weekdays": [day for day, var in enumerate(self.reminder_weekday_vars) if var.get()],
             "font_size": font_size_value,
-        }
+            "calendar_renderer": "canvas" if self.canvas_renderer_var.get() else "labels",
+        })
+        self.calendar_renderer = settings["calendar_renderer"]
         settings_manager.save_settings(settings)
         self._apply_current_fonts()
-        messagebox.showinfo(
-            "Sukces",
-            "Ustawienia zostały zapisane. Aplikacja może wymagać ponownego uruchomienia, aby zmiany w harmonogramie zostały zastosowane."
-        )
+        messagebox.showinfo("Sukces", "Ustawienia zostały zapisane.")
+        self.draw_calendar_view()
+
+    def _on_settings_changed(self, settings):
+        # May run on any thread (e.g. when a worker notices settings.json was edited).
+        self._call_in_ui(self._apply_settings_change, settings)
+
+    def _apply_settings_change(self, settings):
+        """Applies appearance and analysis settings changed outside this window."""
+        analysis.set_backend(settings.get("analysis_backend", "python"))
+        font_size = self._normalize_font_size(settings.get("font_size", self.font_size))
+        renderer = "canvas" if settings.get("calendar_renderer") == "canvas" else "labels"
+        if (font_size, renderer) == (self.font_size, self.calendar_renderer):
+            return
+        self.font_size, self.calendar_renderer = font_size, renderer
+        self.font_size_var.set(font_size)
+        self.canvas_renderer_var.set(renderer == "canvas")
+        self._apply_current_fonts()
         self.draw_calendar_view()
 
     def _refresh_entries(self):
-        raw_entries = data_manager.load_cravings()
-        self._raw_entries = raw_entries
-        enriched = []
-        for entry in raw_entries:
-            entry_copy = dict(entry)
-            parsed_timestamp = self._parse_timestamp(entry_copy.get('timestamp'))
-            triggers_list = self._split_triggers(entry_copy.get('triggers', ''))
-            entry_copy[self._ENTRY_TS_KEY] = parsed_timestamp
-            entry_copy[self._ENTRY_TRIGGERS_KEY] = triggers_list
-            enriched.append(entry_copy)
-        self._enriched_entries = enriched
-        self._month_trigger_cache.clear()
+        """Loads new entries; returns the enriched new ones, or None after a full reload."""
+        new_entries = data_manager.load_new_cravings() if self._raw_entries else None
+        if new_entries is None:
+            raw_entries = data_manager.load_cravings()
+            self._raw_entries = raw_entries
+            self._enriched_entries = [self._enrich_entry(entry) for entry in raw_entries]
+            self._analysis_version = self._analysis_worker.reset(raw_entries)
+            self._month_trigger_cache.clear()
+            return None
+        added = []
+        for entry in new_entries:
+            enriched = self._enrich_entry(entry)
+            self._raw_entries.append(entry)
+            self._enriched_entries.append(enriched)
+            added.append(enriched)
+            timestamp = enriched[self._ENTRY_TS_KEY]
+            if timestamp is not None:
+                self._month_trigger_cache.pop((timestamp.year, timestamp.month), None)
+        if new_entries:
+            self._analysis_version = self._analysis_worker.append(new_entries)
+        return added
+
+    def _enrich_entry(self, entry):
+        entry_copy = dict(entry)
+        entry_copy[self._ENTRY_TS_KEY] = self._parse_timestamp(entry_copy.get('timestamp'))
+        entry_copy[self._ENTRY_TRIGGERS_KEY] = symptoms.symptoms_for_entry(entry_copy)
+        entry_copy[self._ENTRY_MASK_KEY] = symptoms.mask_from_entry(entry_copy)
+        return entry_copy
 
     def _parse_timestamp(self, timestamp_value):
         if isinstance(timestamp_value, datetime):
@@ -605,35 +906,66 @@ class CravingApp:
                 continue
         return None
 
-    def _split_triggers(self, trigger_string):
-        if not trigger_string:
-            return []
-        return [item.strip() for item in str(trigger_string).split(',') if item.strip()]
-
     def _get_month_trigger_lookup(self, date):
         key = (date.year, date.month)
         cached = self._month_trigger_cache.get(key)
         if cached is not None:
             return cached
+        if data_manager.get_backend() == 'sqlite':
+            month_entries = [
+                self._enrich_entry(entry)
+                for entry in data_manager.load_cravings_in_month(date.year, date.month)
+            ]
+        else:
+            month_entries = self._enriched_entries
         trigger_map = {}
-        for entry in self._enriched_entries:
+        for entry in month_entries:
             timestamp = entry.get(self._ENTRY_TS_KEY)
             if not timestamp or timestamp.year != date.year or timestamp.month != date.month:
                 continue
-            triggers = entry.get(self._ENTRY_TRIGGERS_KEY, [])
-            if not triggers:
-                continue
-            day_triggers = trigger_map.setdefault(timestamp.day, set())
-            day_triggers.update(triggers)
-        frozen_map = {day: frozenset(values) for day, values in trigger_map.items()}
-        self._month_trigger_cache[key] = frozen_map
-        return frozen_map
+            symptom_mask = entry.get(self._ENTRY_MASK_KEY, 0)
+            if symptom_mask:
+                trigger_map[timestamp.day] = trigger_map.get(timestamp.day, 0) | symptom_mask
+        self._month_trigger_cache[key] = trigger_map
+        return trigger_map
 
     def send_test_email_action(self):
-        result = email_notifier.send_email("Testowy e-mail z Dzienniczka Głodów Alkoholowych", "To jest testowa wiadomość, aby sprawdzić, czy ustawienia e-mail są poprawne.")
-        messagebox.showinfo("Wynik Wysyłania E-maila", result)
+        email_outbox.get_outbox().enqueue(
+            "Testowy e-mail z Dzienniczka Głodów Alkoholowych",
+            "To jest testowa wiadomość, aby sprawdzić, czy ustawienia e-mail są poprawne.",
+            on_result=self._on_test_email_result,
+            retry=False,
+            kind="test",
+        )
+
+    def _on_test_email_result(self, message, status, delivered):
+        # Runs on the outbox thread, like every e-mail result.
+        self._call_in_ui(messagebox.showinfo, "Wynik Wysyłania E-maila", status)
+
+    def _on_email_result(self, message, status, delivered):
+        # Only the first failure of a reminder is shown; retries keep going in the background.
+        if message.get("kind") == "reminder" and not delivered and message["attempts"] == 1:
+            self._call_in_ui(
+                messagebox.showwarning,
+                "Przypomnienie e-mail",
+                f"Nie udało się wysłać przypomnienia. Aplikacja spróbuje ponownie później.\n\n{status}",
+            )
+
+    def _call_in_ui(self, func, *args):
+        try:
+            self.root.after(0, func, *args)
+        except (RuntimeError, tk.TclError):
+            pass
+
+def _report_startup(app):
+    app.root.update_idletasks()
+    print(startup_probe.STARTUP_PROBE_MARKER, flush=True)
+    app.on_close()
+
 
 if __name__ == "__main__":
     root = tk.Tk()
     app = CravingApp(root)
+    if startup_probe.enabled():
+        root.after_idle(_report_startup, app)
     root.mainloop()
@@ -1,29 +1,157 @@
-import schedule
-import time
+import heapq
+import logging
 import threading
-import email_notifier
+from datetime import datetime, timedelta
+import email_outbox
 import settings_manager
 
+logger = logging.getLogger(__name__)
+
+WEEKDAYS = tuple(range(7))  # Monday = 0, like datetime.weekday()
+
 def send_reminder_email():
-    """Sends a predefined reminder email."""
+    """Queues a predefined reminder email in the outbox."""
     settings = settings_manager.load_settings()
     if settings.get("reminders_enabled"):
         subject = "Codzienne przypomnienie - Dzienniczek Głodów Alkoholowych"
         body = "Pamiętaj, aby dzisiaj uzupełnić swój dzienniczek. Każdy wpis to krok w dobrą stronę!"
-        email_notifier.send_email(subject, body)
+        email_outbox.get_outbox().enqueue(subject, body, kind="reminder")
 
-def run_scheduler():
-    """Runs the scheduler loop."""
-    settings = settings_manager.load_settings()
-    reminder_time = settings.get("reminder_time", "10:00")
+def parse_reminder_time(text):
+    """Returns (hour, minute) for an "HH:MM" string, or None if it is not a valid time."""
+    try:
+        hour, minute = (int(part) for part in str(text).strip().split(":"))
+    except ValueError:
+        return None
+    if 0 <= hour < 24 and 0 <= minute < 60:
+        return hour, minute
+    return None
+
+def reminder_times(settings):
+    """Returns the configured reminder times as sorted (hour, minute) pairs.
+
+    Settings saved before several times were supported only have "reminder_time".
+    """
+    times = settings.get("reminder_times") or [settings.get("reminder_time", "20:00")]
+    return sorted({parsed for parsed in map(parse_reminder_time, times) if parsed is not None})
+
+def reminder_weekdays(settings):
+    weekdays = settings.get("reminder_weekdays")
+    if weekdays is None:
+        return frozenset(WEEKDAYS)
+    return frozenset(day for day in weekdays if day in WEEKDAYS)
+
+def next_occurrence(hour, minute, weekdays, after):
+    """Returns the first datetime later than `after` at hour:minute on one of `weekdays`."""
+    candidate = after.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    if candidate <= after:
+        candidate += timedelta(days=1)
+    for _ in range(7):
+        if candidate.weekday() in weekdays:
+            return candidate
+        candidate += timedelta(days=1)
+    return None
+
+
+class ReminderScheduler:
+    """Fires reminders at their exact due times from one sleeping thread.
 
-    schedule.every().day.at(reminder_time).do(send_reminder_email)
+    The next due time of every job sits in a heap and the thread waits on a
+    threading.Event until the earliest one, so it never polls. reload() and
+    stop() set the event to wake it at once; reload() is called whenever the
+    settings are saved.
+    """
 
-    while True:
-        schedule.run_pending()
-        time.sleep(60) # Check every minute
+    def __init__(self, action=send_reminder_email, now=datetime.now):
+        self._action = action
+        self._now = now
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self._reload_pending = True
+        self._stopped = False
+        self._heap = []
+        self._thread = None
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name="reminder-scheduler", daemon=True)
+        self._thread.start()
+
+    def reload(self, settings=None):
+        with self._lock:
+            self._reload_pending = True
+        self._wake.set()
+
+    def stop(self, timeout=None):
+        with self._lock:
+            self._stopped = True
+        self._wake.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+
+    def next_due(self):
+        with self._lock:
+            return self._heap[0][0] if self._heap else None
+
+    def _rebuild(self):
+        settings = settings_manager.load_settings()
+        heap = []
+        if settings.get("reminders_enabled"):
+            weekdays = reminder_weekdays(settings)
+            now = self._now()
+            for hour, minute in reminder_times(settings):
+                due = next_occurrence(hour, minute, weekdays, now)
+                if due is not None:
+                    heap.append((due, hour, minute, weekdays))
+        heapq.heapify(heap)
+        return heap
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if self._stopped:
+                    return
+                reload_pending, self._reload_pending = self._reload_pending, False
+            if reload_pending:
+                heap = self._rebuild()
+                with self._lock:
+                    self._heap = heap
+            with self._lock:
+                due = self._heap[0][0] if self._heap else None
+            if due is None:
+                self._wake.wait()
+                self._wake.clear()
+                continue
+            delay = (due - self._now()).total_seconds()
+            if delay > 0:
+                # Woken early by reload() or stop(): start over with fresh state.
+                if self._wake.wait(delay):
+                    self._wake.clear()
+                continue
+            now = self._now()
+            with self._lock:
+                # After a suspend or a clock jump every missed slot is overdue;
+                # fire one reminder for all of them and move on from now.
+                while self._heap and self._heap[0][0] <= now:
+                    _, hour, minute, weekdays = heapq.heappop(self._heap)
+                    following = next_occurrence(hour, minute, weekdays, max(due, now))
+                    if following is not None:
+                        heapq.heappush(self._heap, (following, hour, minute, weekdays))
+            try:
+                self._action()
+            except Exception:
+                logger.exception("Sending the reminder failed")
+
+
+_scheduler = ReminderScheduler()
 
 def start_scheduler_thread():
-    """Starts the scheduler in a background thread."""
-    scheduler_thread = threading.Thread(target=run_scheduler, daemon=True)
-    scheduler_thread.start()
\ No newline at end of file
+    """Starts the scheduler in a background thread and reschedules it on every settings save."""
+    settings_manager.subscribe(_scheduler.reload)
+    _scheduler.start()
+
+def stop_scheduler():
+    settings_manager.unsubscribe(_scheduler.reload)
+    _scheduler.stop(timeout=5)
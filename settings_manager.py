@@ -1,5 +1,9 @@
 import json
+import logging
 import os
+import threading
+
+logger = logging.getLogger(__name__)
 
 SETTINGS_FILE = 'settings.json'
 
@@ -11,26 +15,96 @@ DEFAULT_SETTINGS = {
     "recipient_email": "",
     "reminders_enabled": False,
     "reminder_time": "20:00",
+    "reminder_weekdays": [0, 1, 2, 3, 4, 5, 6],
     "font_size": 12,
+    "storage_backend": "csv",
+    "calendar_renderer": "labels",
+    "analysis_backend": "python",
+    "viewer_prewarm": False,
 }
 
-def load_settings():
-    """Loads settings from the JSON file. Returns default settings if the file doesn't exist."""
-    if not os.path.exists(SETTINGS_FILE):
-        with open(SETTINGS_FILE, 'w', encoding='utf-8') as f:
-            json.dump(DEFAULT_SETTINGS, f, indent=4)
-        return DEFAULT_SETTINGS
+# Parsed settings.json, reused while the file's stat signature is unchanged.
+_cache = {"path": None, "signature": None, "settings": None}
+_lock = threading.RLock()
+_subscribers = []
+
+def _copy(settings):
+    # Values are JSON scalars or flat lists, so copying the lists is enough.
+    return {key: list(value) if isinstance(value, list) else value for key, value in settings.items()}
+
+def _stat_signature(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+def _write_file(path, settings):
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(settings, f, indent=4)
+    os.replace(temp_path, path)
+
+def _read_file(path):
     try:
-        with open(SETTINGS_FILE, 'r', encoding='utf-8') as f:
+        with open(path, 'r', encoding='utf-8') as f:
             settings = json.load(f)
-            # Ensure all default keys exist
-            for key, value in DEFAULT_SETTINGS.items():
-                settings.setdefault(key, value)
-            return settings
-    except (json.JSONDecodeError, IOError):
-        return DEFAULT_SETTINGS
+    except (json.JSONDecodeError, UnicodeDecodeError, IOError):
+        settings = None
+    if not isinstance(settings, dict):
+        return _copy(DEFAULT_SETTINGS)
+    # Ensure all default keys exist
+    for key, value in _copy(DEFAULT_SETTINGS).items():
+        settings.setdefault(key, value)
+    return settings
+
+def load_settings():
+    """Returns a copy of the settings, re-reading the JSON file only when it changed on disk.
+
+    Creates the file with the default settings if it doesn't exist. Changes
+    made to the file outside the app are reported to the subscribers.
+    """
+    changed = None
+    with _lock:
+        path = SETTINGS_FILE
+        signature = _stat_signature(path)
+        if signature is None:
+            _write_file(path, DEFAULT_SETTINGS)
+            signature = _stat_signature(path)
+        if _cache["path"] != path or _cache["signature"] != signature:
+            known = _cache["path"] == path and _cache["settings"] is not None
+            _cache.update(path=path, signature=signature, settings=_read_file(path))
+            if known:
+                changed = _copy(_cache["settings"])
+        settings = _copy(_cache["settings"])
+    if changed is not None:
+        _notify(changed)
+    return settings
 
 def save_settings(settings):
-    """Saves the given settings to the JSON file."""
-    with open(SETTINGS_FILE, 'w', encoding='utf-8') as f:
-        json.dump(settings, f, indent=4)
+    """Saves the given settings to the JSON file atomically and notifies the subscribers."""
+    with _lock:
+        path = SETTINGS_FILE
+        _write_file(path, settings)
+        _cache.update(path=path, signature=_stat_signature(path), settings=_copy(settings))
+    _notify(_copy(settings))
+
+def _notify(settings):
+    for callback in list(_subscribers):
+        try:
+            callback(settings)
+        except Exception:
+            logger.exception("Settings subscriber failed")
+
+def subscribe(callback):
+    """Registers callback(settings), called after every save_settings() and when settings.json changes on disk.
+
+    Callbacks run on the thread that noticed the change; anything touching
+    Tk has to go through root.after.
+    """
+    if callback not in _subscribers:
+        _subscribers.append(callback)
+
+def unsubscribe(callback):
+    if callback in _subscribers:
+        _subscribers.remove(callback)
@@ -0,0 +1,176 @@
+# SQLite storage backend with the same entry contract as the CSV file.
+import csv
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+import symptoms
+
+DB_FILE = 'cravings.db'
+FIELDNAMES = ['timestamp', 'intensity', 'triggers', 'coping_mechanism', 'drank', 'symptom_mask']
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp TEXT NOT NULL DEFAULT '',
+    intensity TEXT NOT NULL DEFAULT '',
+    triggers TEXT NOT NULL DEFAULT '',
+    coping_mechanism TEXT NOT NULL DEFAULT '',
+    drank TEXT NOT NULL DEFAULT '',
+    symptom_mask INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_entries_timestamp ON entries (timestamp);
+CREATE TABLE IF NOT EXISTS entry_symptoms (
+    entry_id INTEGER NOT NULL REFERENCES entries (id) ON DELETE CASCADE,
+    symptom TEXT NOT NULL,
+    PRIMARY KEY (entry_id, symptom)
+);
+CREATE INDEX IF NOT EXISTS idx_entry_symptoms_symptom ON entry_symptoms (symptom, entry_id);
+"""
+
+_SELECT_ENTRIES = "SELECT id, timestamp, intensity, triggers, coping_mechanism, drank, symptom_mask FROM entries"
+
+# Highest entry id returned so far, so appended rows can be fetched on their own.
+_read_state = {"path": None, "last_id": 0}
+# Database files whose schema has been created or migrated by this process.
+_schema_ready = set()
+_schema_lock = threading.Lock()
+
+
+def connect():
+    # The schema is set up once per database file, not on every connection;
+    # a file that was deleted in the meantime gets it again.
+    path = os.path.abspath(DB_FILE)
+    created = not os.path.exists(path)
+    connection = sqlite3.connect(DB_FILE)
+    connection.execute("PRAGMA foreign_keys = ON")
+    with _schema_lock:
+        if created or path not in _schema_ready:
+            connection.executescript(_SCHEMA)
+            _migrate_symptom_mask(connection)
+            _schema_ready.add(path)
+    return connection
+
+
+def _migrate_symptom_mask(connection):
+    """Adds the symptom_mask column to databases created before it existed.
+
+    Older databases also split symptom names containing commas into several
+    junction rows, so those are rebuilt from the triggers text as well.
+    """
+    columns = {row[1] for row in connection.execute("PRAGMA table_info(entries)")}
+    if 'symptom_mask' in columns:
+        return
+    with connection:
+        connection.execute("ALTER TABLE entries ADD COLUMN symptom_mask INTEGER NOT NULL DEFAULT 0")
+        rows = connection.execute("SELECT id, triggers FROM entries").fetchall()
+        connection.executemany(
+            "UPDATE entries SET symptom_mask = ? WHERE id = ?",
+            [(symptoms.mask_from_entry({'triggers': triggers}), entry_id) for entry_id, triggers in rows],
+        )
+        connection.execute("DELETE FROM entry_symptoms")
+        connection.executemany(
+            "INSERT INTO entry_symptoms (entry_id, symptom) VALUES (?, ?)",
+            [
+                (entry_id, symptom)
+                for entry_id, triggers in rows
+                for symptom in set(symptoms.split_triggers(triggers))
+            ],
+        )
+
+
+def database_exists():
+    return os.path.exists(DB_FILE)
+
+
+def _row_to_entry(row):
+    entry = dict(zip(FIELDNAMES, row[1:]))
+    entry['symptom_mask'] = str(entry['symptom_mask'])
+    return entry
+
+
+def _insert_entries(connection, entries):
+    for data in entries:
+        values = [str(data.get(field) if data.get(field) is not None else '') for field in FIELDNAMES[:-1]]
+        values.append(symptoms.mask_from_entry(data))
+        cursor = connection.execute(
+            "INSERT INTO entries (timestamp, intensity, triggers, coping_mechanism, drank, symptom_mask) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            values,
+        )
+        connection.executemany(
+            "INSERT INTO entry_symptoms (entry_id, symptom) VALUES (?, ?)",
+            [(cursor.lastrowid, symptom) for symptom in set(symptoms.symptoms_for_entry(data))],
+        )
+
+
+def save_craving(data):
+    """Saves a single craving entry."""
+    connection = connect()
+    try:
+        with connection:
+            _insert_entries(connection, [data])
+    finally:
+        connection.close()
+
+
+def _fetch(query, params=()):
+    connection = connect()
+    try:
+        return connection.execute(query, params).fetchall()
+    finally:
+        connection.close()
+
+
+def load_cravings():
+    """Loads all craving entries in insertion order."""
+    rows = _fetch(f"{_SELECT_ENTRIES} ORDER BY id")
+    _read_state.update(path=DB_FILE, last_id=rows[-1][0] if rows else 0)
+    return [_row_to_entry(row) for row in rows]
+
+
+def load_new_cravings():
+    """Loads only the entries inserted since the last read, or None if the database was replaced."""
+    if _read_state["path"] != DB_FILE or not database_exists():
+        return None
+    rows = _fetch(f"{_SELECT_ENTRIES} WHERE id > ? ORDER BY id", (_read_state["last_id"],))
+    if rows:
+        _read_state["last_id"] = rows[-1][0]
+    return [_row_to_entry(row) for row in rows]
+
+
+def load_cravings_between(start, end):
+    """Loads entries with start <= timestamp < end using the timestamp index."""
+    rows = _fetch(
+        f"{_SELECT_ENTRIES} WHERE timestamp >= ? AND timestamp < ? ORDER BY timestamp, id",
+        (start.strftime("%Y-%m-%d %H:%M:%S"), end.strftime("%Y-%m-%d %H:%M:%S")),
+    )
+    return [_row_to_entry(row) for row in rows]
+
+
+def load_cravings_in_month(year, month):
+    start = datetime(year, month, 1)
+    end = datetime(year + 1, 1, 1) if month == 12 else datetime(year, month + 1, 1)
+    return load_cravings_between(start, end)
+
+
+def migrate_from_csv(csv_path):
+    """Copies every entry from the CSV file into an empty database.
+
+    Returns the number of migrated entries. Does nothing if the database
+    already holds entries, so it is safe to call on every start.
+    """
+    if not os.path.exists(csv_path):
+        return 0
+    connection = connect()
+    try:
+        if connection.execute("SELECT 1 FROM entries LIMIT 1").fetchone():
+            return 0
+        with open(csv_path, 'r', newline='', encoding='utf-8') as f:
+            entries = list(csv.DictReader(f))
+        with connection:
+            _insert_entries(connection, entries)
+        return len(entries)
+    finally:
+        connection.close()
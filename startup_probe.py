@@ -0,0 +1,11 @@
+# Shared by main.py and startup_timing.py; kept free of imports so the timing
+# harness does not load the app itself.
+import os
+
+# When set, the app reports once the first frame is drawn and exits (used by startup_timing.py).
+STARTUP_PROBE_ENV = "CRAVING_STARTUP_PROBE"
+STARTUP_PROBE_MARKER = "startup-ready"
+
+
+def enabled():
+    return bool(os.environ.get(STARTUP_PROBE_ENV))
@@ -0,0 +1,82 @@
+# Measures how long the app takes to start.
+#
+#   python startup_timing.py [--runs N] [--top N]
+#
+# Prints the slowest imports of main.py (from `python -X importtime`) and the
+# time from launching `python main.py` until the calendar is drawn and the
+# window is interactive. Needs a display, and runs in the current directory,
+# so it sees the same data files as a normal start.
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+import startup_probe
+
+_IMPORT_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def import_times(top):
+    """Returns [(cumulative_us, self_us, module)] for the slowest imports made by main.py."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = []
+    for line in result.stderr.splitlines():
+        match = _IMPORT_LINE.match(line)
+        if match is None:
+            continue
+        self_us, cumulative_us, indent, module = match.groups()
+        # Each nesting level adds two spaces of indent. Keep main itself (the
+        # total) and what it imports directly, whose times include their own imports.
+        if (len(indent) - 1) // 2 <= 1:
+            times.append((int(cumulative_us), int(self_us), module))
+    times.sort(reverse=True)
+    return times[:top]
+
+
+def time_to_interactive():
+    """Launches the app once and returns the seconds until it reports its first frame."""
+    environment = dict(os.environ, **{startup_probe.STARTUP_PROBE_ENV: "1"})
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "main.py"],
+        stdout=subprocess.PIPE,
+        text=True,
+        env=environment,
+    )
+    try:
+        for line in process.stdout:
+            if line.strip() == startup_probe.STARTUP_PROBE_MARKER:
+                return time.perf_counter() - started
+    finally:
+        process.wait()
+    raise RuntimeError(f"main.py exited with code {process.returncode} before drawing its window")
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Measures the startup time of the app.")
+    parser.add_argument("--runs", type=int, default=5, help="number of launches to time")
+    parser.add_argument("--top", type=int, default=15, help="number of imports to list")
+    args = parser.parse_args()
+
+    print("Slowest imports (cumulative ms, self ms, module):")
+    for cumulative_us, self_us, module in import_times(args.top):
+        print(f"  {cumulative_us / 1000:8.1f} {self_us / 1000:8.1f}  {module}")
+
+    samples = [time_to_interactive() for _ in range(args.runs)]
+    print(
+        f"Time to interactive over {len(samples)} runs: "
+        f"median {statistics.median(samples) * 1000:.0f} ms, "
+        f"min {min(samples) * 1000:.0f} ms, max {max(samples) * 1000:.0f} ms"
+    )
+
+
+if __name__ == "__main__":
+    main_cli()
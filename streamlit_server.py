@@ -0,0 +1,139 @@
+# Keeps a single Streamlit viewer server running for the desktop app.
+import socket
+import subprocess
+import threading
+import time
+import urllib.error
+import urllib.request
+import webbrowser
+
+HOST = "127.0.0.1"
+STARTUP_TIMEOUT = 30.0
+HEALTH_TIMEOUT = 1.0
+HEALTH_PATHS = ("/_stcore/health", "/healthz")
+STOP_TIMEOUT = 5.0
+
+
+def _free_port(host=HOST):
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind((host, 0))
+        return sock.getsockname()[1]
+
+
+class StreamlitServer:
+    """Supervises one `streamlit run` process serving a script on a local port.
+
+    open() reuses the server while it answers its health check, starts it
+    on first use and restarts it if it crashed or stopped answering; the
+    checks and the browser call run on a background thread so Tk never waits.
+    """
+
+    def __init__(self, script, host=HOST, popen=subprocess.Popen, open_url=webbrowser.open):
+        self.script = script
+        self.host = host
+        self.port = None
+        self._popen = popen
+        self._open_url = open_url
+        self._process = None
+        self._started_at = 0.0
+        self._waiting = False
+        self._lock = threading.Lock()
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}"
+
+    def is_running(self):
+        return self._process is not None and self._process.poll() is None
+
+    def is_healthy(self):
+        if not self.is_running():
+            return False
+        for path in HEALTH_PATHS:
+            try:
+                with urllib.request.urlopen(f"{self.url}{path}", timeout=HEALTH_TIMEOUT) as response:
+                    if response.status == 200:
+                        return True
+            except urllib.error.HTTPError:
+                continue
+            except (OSError, ValueError):
+                return False
+        return False
+
+    def start(self):
+        """Starts the server unless it is already running; may raise FileNotFoundError."""
+        with self._lock:
+            if self.is_running():
+                return
+            self.port = _free_port(self.host)
+            self._process = self._popen([
+                "streamlit", "run", self.script,
+                "--server.address", self.host,
+                "--server.port", str(self.port),
+                "--server.headless", "true",
+            ])
+            self._started_at = time.monotonic()
+
+    def wait_until_healthy(self, timeout=STARTUP_TIMEOUT):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if not self.is_running():
+                return False
+            if self.is_healthy():
+                return True
+            time.sleep(0.25)
+        return False
+
+    def open(self, on_error=None):
+        """Shows the viewer in the browser, (re)starting the server when needed.
+
+        Returns at once; the health check, any restart and the browser call run
+        on a background thread. on_error(message) is called from that thread if
+        the server cannot be started.
+        """
+        with self._lock:
+            # Clicks while the server is still starting share one browser tab.
+            if self._waiting:
+                return
+            self._waiting = True
+        threading.Thread(target=self._open_when_healthy, args=(on_error,), daemon=True).start()
+
+    def _open_when_healthy(self, on_error):
+        try:
+            healthy = self.is_healthy()
+            if not healthy:
+                if self.is_running() and time.monotonic() - self._started_at >= STARTUP_TIMEOUT:
+                    # Alive but not answering long after startup: it hung.
+                    self.stop()
+                elif self._process is not None and not self.is_running():
+                    self._process = None
+                try:
+                    self.start()
+                except FileNotFoundError:
+                    if on_error is not None:
+                        on_error("Nie można uruchomić Streamlit. Upewnij się, że jest zainstalowany i dostępny w PATH.")
+                    return
+                healthy = self.wait_until_healthy()
+        finally:
+            with self._lock:
+                self._waiting = False
+        if healthy:
+            self._open_url(self.url)
+            return
+        if not self.is_running():
+            # Crashed during startup; the next open() starts a fresh process.
+            self._process = None
+        if on_error is not None:
+            on_error("Panel Streamlit nie uruchomił się poprawnie.")
+
+    def stop(self):
+        with self._lock:
+            process, self._process = self._process, None
+        if process is None or process.poll() is not None:
+            return
+        process.terminate()
+        try:
+            process.wait(timeout=STOP_TIMEOUT)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
@@ -1,4 +1,5 @@
 # -*- coding: utf-8 -*-
+from functools import lru_cache
 
 SYMPTOM_LIST = [
     "Potrzeba napicia alkoholu",
@@ -22,4 +23,72 @@ SYMPTOM_LIST = [
     "Trudności w zorganizowaniu dnia",
     "Nuda, monotonia",
     "Opowiadanie dowcipów alkoholowych"
-]
\ No newline at end of file
+]
+
+# A symptom's ID is its position in SYMPTOM_LIST and doubles as its bit in an
+# entry's symptom mask, so new symptoms must only ever be appended.
+SYMPTOM_IDS = {name: index for index, name in enumerate(SYMPTOM_LIST)}
+SYMPTOM_BITS = {name: 1 << index for name, index in SYMPTOM_IDS.items()}
+TRIGGER_SEPARATOR = ", "
+_MAX_NAME_PARTS = max(name.count(",") for name in SYMPTOM_LIST) + 1
+
+
+def mask_from_symptoms(names):
+    """Encodes known symptom names as a bitmask; unknown names are ignored."""
+    mask = 0
+    for name in names:
+        mask |= SYMPTOM_BITS.get(name, 0)
+    return mask
+
+
+@lru_cache(maxsize=4096)
+def symptoms_from_mask(mask):
+    """Decodes a bitmask into a tuple of symptom names in SYMPTOM_LIST order."""
+    return tuple(name for name, bit in SYMPTOM_BITS.items() if mask & bit)
+
+
+@lru_cache(maxsize=4096)
+def triggers_text(mask):
+    return TRIGGER_SEPARATOR.join(symptoms_from_mask(mask))
+
+
+def split_triggers(trigger_string):
+    """Splits a comma-joined trigger string, keeping symptom names that contain commas intact."""
+    if not trigger_string:
+        return []
+    parts = [item.strip() for item in str(trigger_string).split(',')]
+    result = []
+    index = 0
+    while index < len(parts):
+        for size in range(min(_MAX_NAME_PARTS, len(parts) - index), 0, -1):
+            candidate = TRIGGER_SEPARATOR.join(parts[index:index + size])
+            if size == 1 or candidate in SYMPTOM_IDS:
+                if candidate:
+                    result.append(candidate)
+                index += size
+                break
+    return result
+
+
+def mask_from_entry(entry):
+    """Returns the symptom mask of an entry, computing it from the text for legacy rows."""
+    value = entry.get('symptom_mask')
+    if value not in (None, ""):
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            pass
+    return mask_from_symptoms(split_triggers(entry.get('triggers', '')))
+
+
+def symptoms_for_entry(entry):
+    """Returns the trigger names of an entry.
+
+    Entries written by the app store exactly the symptoms of their mask, which
+    are decoded without any string parsing; anything else is split from text.
+    """
+    trigger_string = entry.get('triggers') or ''
+    mask = mask_from_entry(entry)
+    if triggers_text(mask) == trigger_string:
+        return list(symptoms_from_mask(mask))
+    return split_triggers(trigger_string)
@@ -1,6 +1,13 @@
 import streamlit as st
+import numpy as np
 import pandas as pd
 import os
+import threading
+import analysis
+import data_manager
+import settings_manager
+import sqlite_storage
+import symptoms
 
 # --- Page Configuration ---
 st.set_page_config(
@@ -11,22 +18,162 @@ st.set_page_config(
 
 # --- Data Loading ---
 DATA_FILE = 'cravings.csv'
+_storage_backend = settings_manager.load_settings().get("storage_backend", "csv")
+if data_manager.get_backend() != _storage_backend:
+    # Switching also forgets the read position, so only do it on a real change.
+    data_manager.set_backend(_storage_backend)
 
-@st.cache_data
-def load_data():
-    if not os.path.exists(DATA_FILE):
-        return pd.DataFrame()
+@st.cache_resource
+def _data_cache():
+    # Shared by every session and rerun; data_manager remembers how far the
+    # file has been read, so only rows appended since then are parsed.
+    return {"lock": threading.Lock(), "signature": None, "frame": None, "rolling_stats": None, "aggregates": None}
+
+def _data_signature():
+    path = sqlite_storage.DB_FILE if data_manager.get_backend() == 'sqlite' else DATA_FILE
     try:
-        df = pd.read_csv(DATA_FILE)
-        df['timestamp'] = pd.to_datetime(df['timestamp'])
-        df['intensity'] = pd.to_numeric(df['intensity'], errors='coerce')
-        # Split comma-separated symptoms into a list
-        df['triggers_list'] = df['triggers'].str.split(', ')
-        return df
-    except (FileNotFoundError, pd.errors.EmptyDataError):
-        return pd.DataFrame()
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return path, stat.st_mtime_ns, stat.st_size
+
+def _to_frame(rows):
+    df = pd.DataFrame(rows, columns=data_manager.FIELDNAMES)
+    df = df.mask(df.eq(''))
+    df['symptom_mask'] = pd.Series([symptoms.mask_from_entry(row) for row in rows], dtype='int64')
+    df['timestamp'] = pd.to_datetime(df['timestamp'])
+    df['intensity'] = pd.to_numeric(df['intensity'], errors='coerce')
+    # Split comma-separated symptoms into a list, keeping names that contain commas intact
+    df['triggers_list'] = df['triggers'].map(symptoms.split_triggers, na_action='ignore')
+    return df
+
+def _snapshot_frame(columns):
+    """Builds the entries frame from the memory-mapped columnar snapshot without parsing text.
+
+    The columns are copied, so the cached frame never refers to the mapped files.
+    """
+    # The original trigger text is kept, so names outside SYMPTOM_LIST survive;
+    # each distinct text is split once. Code -1 (no triggers) maps to the last slot.
+    triggers_table = columns['triggers_table']
+    triggers = np.array(list(triggers_table) + [None], dtype=object)
+    triggers_lists = np.empty(len(triggers_table) + 1, dtype=object)
+    triggers_lists[:] = [symptoms.split_triggers(text) or None for text in triggers_table] + [None]
+    trigger_codes = np.array(columns['triggers'])
+    intensity = np.asarray(columns['intensity'])
+    return pd.DataFrame({
+        'timestamp': np.array(columns['timestamp']).view('datetime64[s]'),
+        'intensity': np.where(intensity > 0, intensity, np.nan),
+        'triggers': triggers[trigger_codes],
+        'coping_mechanism': pd.Categorical.from_codes(np.array(columns['coping']), categories=columns['coping_table']),
+        'drank': np.where(np.asarray(columns['drank']), 'Tak', 'Nie'),
+        'symptom_mask': np.array(columns['symptom_mask']),
+        'triggers_list': triggers_lists[trigger_codes],
+    })
+
+def load_data():
+    """Returns (entries frame, rolling stats), reading only what changed since the last run.
+
+    Nothing is read while the data file's (mtime_ns, size) is unchanged. The
+    first load comes from the columnar snapshot when it is available (NumPy
+    and the CSV backend) and from the whole data file otherwise; after that
+    only the appended rows are parsed and added to the cached frame.
+    The returned frame is shared, so it must not be modified in place.
+    """
+    cache = _data_cache()
+    with cache["lock"]:
+        signature = _data_signature()
+        if signature is None:
+            return pd.DataFrame(), analysis.RollingStats()
+        if signature != cache["signature"]:
+            new_rows = data_manager.load_new_cravings() if cache["frame"] is not None else None
+            if new_rows is None:
+                # First load, or the file was replaced: start from scratch.
+                columns = data_manager.load_snapshot()
+                if columns is not None:
+                    cache["frame"] = _snapshot_frame(columns)
+                    cache["rolling_stats"] = analysis.RollingStats.from_columns(columns)
+                else:
+                    rows = data_manager.load_cravings()
+                    cache["frame"] = _to_frame(rows)
+                    cache["rolling_stats"] = analysis.RollingStats(rows)
+            elif new_rows:
+                cache["frame"] = pd.concat([cache["frame"], _to_frame(new_rows)], ignore_index=True)
+                for row in new_rows:
+                    cache["rolling_stats"].add(row)
+            cache["signature"] = signature
+        return cache["frame"], cache["rolling_stats"]
+
+def _symptom_rows(df):
+    """One row per (entry, symptom) with the entry's intensity and drink flag, indexed by entry."""
+    exploded = df[['triggers_list', 'intensity', 'drank']].explode('triggers_list').dropna(subset=['triggers_list'])
+    extra_names = sorted(set(exploded['triggers_list'].unique()) - set(symptoms.SYMPTOM_LIST))
+    return pd.DataFrame({
+        'symptom': pd.Categorical(exploded['triggers_list'], categories=list(symptoms.SYMPTOM_LIST) + extra_names),
+        'intensity': exploded['intensity'].astype('float64'),
+        'drank': exploded['drank'].eq('Tak'),
+    }, index=exploded.index)
+
+def summarize_symptoms(symptom_rows):
+    """Per-symptom entry count, mean intensity and drink rate, most frequent first."""
+    summary = symptom_rows.groupby('symptom', observed=True).agg(
+        count=('symptom', 'size'),
+        mean_intensity=('intensity', 'mean'),
+        drink_rate=('drank', 'mean'),
+    )
+    return summary.sort_values('count', ascending=False)
 
-df = load_data()
+def _coping_counts(df):
+    # value_counts() of a Categorical also lists unused categories with 0.
+    counts = df['coping_mechanism'].value_counts()
+    return counts[counts > 0]
+
+def load_aggregates(df):
+    """Returns the split-symptom rows and the all-entries aggregates, computed once per data version."""
+    cache = _data_cache()
+    with cache["lock"]:
+        aggregates = cache["aggregates"]
+        if aggregates is None or aggregates["frame"] is not df:
+            symptom_rows = _symptom_rows(df)
+            aggregates = cache["aggregates"] = {
+                "frame": df,
+                "symptom_rows": symptom_rows,
+                "symptom_summary": summarize_symptoms(symptom_rows),
+                "coping_counts": _coping_counts(df),
+            }
+        return aggregates
+
+df, rolling_stats = load_data()
+
+# --- Filtering and Resampling ---
+PAGE_SIZES = (25, 50, 100)
+# Charts never receive more points than this, whatever the history length.
+MAX_CHART_POINTS = 366
+
+def filter_entries(df, date_range, symptom_names, intensity_range):
+    """Returns the rows matching all filters; everything is evaluated in pandas on the server."""
+    keep = pd.Series(True, index=df.index)
+    if date_range is not None:
+        start, end = date_range
+        days = df['timestamp'].dt.normalize()
+        keep &= days.between(pd.Timestamp(start), pd.Timestamp(end))
+    if symptom_names:
+        wanted = symptoms.mask_from_symptoms(symptom_names)
+        keep &= (df['symptom_mask'] & wanted) != 0
+    low, high = intensity_range
+    if (low, high) != (1, 10):
+        keep &= df['intensity'].between(low, high)
+    return df[keep]
+
+def resample_for_chart(series, max_points=MAX_CHART_POINTS):
+    """Averages a timestamp-indexed series per day, week or month, whichever fits in max_points."""
+    series = series[series.index.notna()].dropna()
+    if len(series) <= max_points:
+        return series.sort_index()
+    for rule in ('D', 'W', 'MS', 'QS', 'YS'):
+        resampled = series.resample(rule).mean().dropna()
+        if len(resampled) <= max_points:
+            return resampled
+    return resampled.iloc[-max_points:]
 
 # --- Main Dashboard ---
 st.title("📊 Analiza Dzienniczka Głodów Alkoholowych")
@@ -34,8 +181,40 @@ st.title("📊 Analiza Dzienniczka Głodów Alkoholowych")
 if df.empty:
     st.warning("Brak danych w dzienniczku. Dodaj wpisy w głównej aplikacji, aby zobaczyć analizę.")
 else:
+    # --- Filters ---
+    st.sidebar.header("Filtry")
+    first_day = df['timestamp'].min()
+    last_day = df['timestamp'].max()
+    date_range = None
+    if pd.notna(first_day):
+        selected_dates = st.sidebar.date_input(
+            "Zakres dat",
+            value=(first_day.date(), last_day.date()),
+            min_value=first_day.date(),
+            max_value=last_day.date(),
+        )
+        # Entries without a date are only hidden once the range is narrowed.
+        if len(selected_dates) == 2 and tuple(selected_dates) != (first_day.date(), last_day.date()):
+            date_range = tuple(selected_dates)
+    selected_symptoms = st.sidebar.multiselect("Objawy (dowolny z wybranych)", symptoms.SYMPTOM_LIST)
+    intensity_range = st.sidebar.slider("Intensywność", min_value=1, max_value=10, value=(1, 10))
+    filtered = filter_entries(df, date_range, selected_symptoms, intensity_range)
+    aggregates = load_aggregates(df)
+    if len(filtered) == len(df):
+        symptom_summary = aggregates["symptom_summary"]
+        coping_counts = aggregates["coping_counts"]
+    else:
+        symptom_rows = aggregates["symptom_rows"]
+        symptom_summary = summarize_symptoms(symptom_rows[symptom_rows.index.isin(filtered.index)])
+        coping_counts = _coping_counts(filtered)
+
     st.header("Historia Wpisów")
-    st.dataframe(df.drop(columns=['triggers_list']))
+    page_size = st.sidebar.selectbox("Wpisów na stronę", PAGE_SIZES)
+    page_count = max(1, -(-len(filtered) // page_size))
+    page = st.number_input("Strona", min_value=1, max_value=page_count, value=1, step=1)
+    st.caption(f"Strona {page} z {page_count} ({len(filtered)} z {len(df)} wpisów)")
+    page_rows = filtered.iloc[(page - 1) * page_size:page * page_size]
+    st.dataframe(page_rows.drop(columns=['triggers_list', 'symptom_mask'], errors='ignore'))
 
     st.divider()
 
@@ -45,18 +224,18 @@ else:
     col1, col2 = st.columns(2)
 
     with col1:
-        # Intensity over time
+        # Intensity over time, averaged per day/week/month so the chart stays small
         st.subheader("Intensywność Głodów w Czasie")
-        st.line_chart(df.set_index('timestamp')['intensity'])
+        st.line_chart(resample_for_chart(filtered.set_index('timestamp')['intensity']))
 
     with col2:
         # Average intensity
-        avg_intensity = df['intensity'].mean()
-        st.metric("Średnia Intensywność", f"{avg_intensity:.2f}")
+        avg_intensity = filtered['intensity'].mean()
+        st.metric("Średnia Intensywność", f"{avg_intensity:.2f}" if pd.notna(avg_intensity) else "N/A")
 
         # Total entries
-        total_entries = len(df)
-        st.metric("Całkowita Liczba Wpisów", total_entries)
+        total_entries = len(filtered)
+        st.metric("Liczba Wpisów", total_entries)
 
         # Days since first entry
         days_since_start = (df['timestamp'].max() - df['timestamp'].min()).days
@@ -64,19 +243,43 @@ else:
 
     st.divider()
 
+    # Rolling windows ending today, answered from per-day prefix sums
+    st.subheader("Średnie Kroczące")
+    rolling_rows = []
+    for days in analysis.ROLLING_WINDOWS:
+        window = rolling_stats.last_days(days)
+        top_symptom = max(window['symptoms'].items(), key=lambda item: item[1], default=(None, 0))
+        rolling_rows.append({
+            "Okres": f"Ostatnie {days} dni",
+            "Wpisy": window['entries'],
+            "Wpisy dziennie": round(window['entries_per_day'], 2),
+            "Średnia intensywność": round(window['avg_intensity'], 2) if window['avg_intensity'] is not None else None,
+            "Spożycie": window['drinks'],
+            "Najczęstszy objaw": top_symptom[0] if top_symptom[1] else "-",
+        })
+    st.table(pd.DataFrame(rolling_rows).set_index("Okres"))
+
+    st.divider()
+
     col3, col4 = st.columns(2)
 
     with col3:
         # Most common symptoms
         st.subheader("Najczęstsze Objawy/Wyzwalacze")
-        symptoms_flat_list = [symptom for sublist in df['triggers_list'].dropna() for symptom in sublist]
-        symptom_counts = pd.Series(symptoms_flat_list).value_counts()
-        st.bar_chart(symptom_counts)
+        st.bar_chart(symptom_summary['count'])
 
     with col4:
         # Most common coping mechanisms
         st.subheader("Najskuteczniejsze Sposoby Radzenia Sobie")
-        coping_counts = df['coping_mechanism'].value_counts()
         st.bar_chart(coping_counts)
 
+    st.subheader("Objawy a Intensywność i Spożycie")
+    st.dataframe(
+        symptom_summary.rename(columns={
+            'count': "Liczba wpisów",
+            'mean_intensity': "Średnia intensywność",
+            'drink_rate': "Odsetek ze spożyciem",
+        }).round(2)
+    )
+
     st.info("Ta interaktywna deska rozdzielcza pozwala na głębszą analizę Twoich danych. Używaj jej regularnie, aby śledzić swoje postępy.")
\ No newline at end of file